@@ -1,3 +1,3 @@
 """Foroactivo Discord Monitor - Monitor forum threads and send Discord notifications."""
 
-__version__ = "1.0.0"
+__version__ = "1.1.0"
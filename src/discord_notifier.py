@@ -1,30 +1,217 @@
 """Discord Notifier - Send formatted notifications to Discord via webhooks."""
 
+import logging
+import random
+import threading
 import time
-from typing import Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+from .models import PostRef, ThreadRef
+
+logger = logging.getLogger(__name__)
+
+# Sent per request so a session shared with the forum client is unaffected
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Fields shared by every embed of a kind, built once and never mutated
+_FOOTER = {"text": "Foroactivo Monitor"}
+_THREAD_EMBED_TEMPLATE = {"color": 0x57F287, "footer": _FOOTER}  # Discord Green for new threads
+_POST_EMBED_TEMPLATE = {"color": 0x5865F2, "footer": _FOOTER}  # Discord Blurple for new replies
+
+
+class RateLimiter:
+    """Track a Discord rate limit bucket from its response headers."""
+
+    def __init__(self):
+        """Initialize the rate limiter with an unknown (unlimited) bucket."""
+        self.remaining = None
+        self.reset_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the bucket allows another request."""
+        with self._lock:
+            if self.remaining == 0:
+                delay = self.reset_at - time.monotonic()
+                if delay > 0:
+                    logger.info("Rate limit bucket exhausted, waiting %.2fs", delay)
+                    time.sleep(delay)
+                self.remaining = None
+
+    def update(self, response: requests.Response) -> None:
+        """Update the bucket from Discord's X-RateLimit-* response headers.
+
+        Args:
+            response: Response to a webhook request
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if remaining is None or reset_after is None:
+            return
+
+        with self._lock:
+            self.remaining = int(remaining)
+            self.reset_at = time.monotonic() + float(reset_after)
 
 
 class DiscordNotifier:
     """Handle Discord webhook notifications."""
 
     # Discord embed color (blue for new replies)
-    EMBED_COLOR = 0x5865F2  # Discord Blurple
+    EMBED_COLOR = _POST_EMBED_TEMPLATE["color"]
 
-    def __init__(self, webhook_url: str):
+    # Retries after a 429, each waiting twice as long as the previous one
+    MAX_RETRIES = 3
+    # Upper bound of the random delay added to each backoff, in seconds
+    RETRY_JITTER = 1.0
+
+    # Rate limit buckets shared by every notifier posting to the same webhook
+    _rate_limiters: Dict[str, RateLimiter] = {}
+    _rate_limiters_lock = threading.Lock()
+
+    def __init__(self, webhook_url: str, proxy_base: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         """Initialize the Discord notifier.
 
         Args:
             webhook_url: Discord webhook URL
+            proxy_base: Optional base URL of a Discord webhook proxy. When set,
+                messages are posted to the proxy's queue endpoint, which
+                handles rate limiting and retries server-side.
+            session: Optional shared session; a new pooled one is created if
+                not given
         """
+        self.proxy_mode = bool(proxy_base)
+        if proxy_base:
+            # https://discord.com/api/webhooks/<id>/<token>
+            #   -> <proxy_base>/api/webhooks/<id>/<token>/queue
+            webhook_path = urlparse(webhook_url).path.rstrip("/")
+            webhook_url = f"{proxy_base.rstrip('/')}{webhook_path}/queue"
         self.webhook_url = webhook_url
 
-    def send_thread_notification(self, thread: Dict[str, str], forum_name: str = "Forum") -> bool:
+        # Reuse one connection pool so every notification after the first
+        # skips the TCP + TLS handshake to discord.com
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+        self.session = session
+
+        # Background sender so Discord latency stays off the scraper's critical
+        # path. A single worker keeps messages in order and the pacing intact.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="discord")
+
+        # Pace requests using the limits Discord reports for this webhook
+        self.rate_limiter = self._rate_limiter_for(webhook_url)
+
+        # Set once test_webhook succeeds so later checks skip the request
+        self._webhook_validated = False
+
+    def _post(self, payload: Dict) -> requests.Response:
+        """Post a payload to the webhook, respecting the rate limit bucket.
+
+        Args:
+            payload: Webhook message payload
+
+        Returns:
+            Response from Discord
+        """
+        self.rate_limiter.wait()
+        # orjson encodes in C; the Content-Type is set explicitly for raw bytes
+        response = self.session.post(
+            self.webhook_url, data=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=10
+        )
+        self.rate_limiter.update(response)
+        return response
+
+    @classmethod
+    def _rate_limiter_for(cls, webhook_url: str) -> RateLimiter:
+        """Get the rate limiter tracking a webhook, creating it on first use.
+
+        Args:
+            webhook_url: URL requests are posted to
+
+        Returns:
+            Rate limiter shared by all notifiers for the webhook
+        """
+        with cls._rate_limiters_lock:
+            if webhook_url not in cls._rate_limiters:
+                cls._rate_limiters[webhook_url] = RateLimiter()
+            return cls._rate_limiters[webhook_url]
+
+    def _post_with_retries(self, payload: Dict) -> requests.Response:
+        """Post a payload, backing off and retrying while rate limited.
+
+        The first retry waits the delay Discord asks for; each further retry
+        doubles it. A random jitter keeps concurrent senders from retrying in
+        lockstep. In proxy mode the proxy retries on its own, so 429s are
+        returned as-is.
+
+        Args:
+            payload: Webhook message payload
+
+        Returns:
+            Response to the last attempt
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            response = self._post(payload)
+            if response.status_code != 429 or self.proxy_mode or attempt == self.MAX_RETRIES:
+                return response
+
+            delay = self._retry_after(response) * 2 ** attempt + random.uniform(0, self.RETRY_JITTER)
+            logger.warning(
+                "Discord rate limit hit, retrying in %.2fs (attempt %d/%d)",
+                delay, attempt + 1, self.MAX_RETRIES
+            )
+            time.sleep(delay)
+
+        return response
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Get how long to wait after a 429 response.
+
+        Discord sends the delay in headers as well as in the JSON body;
+        reading the header avoids parsing the body, which may not even be
+        JSON during outages.
+
+        Args:
+            response: Rate-limited response
+
+        Returns:
+            Seconds to wait before retrying
+        """
+        return float(
+            response.headers.get("Retry-After")
+            or response.headers.get("X-RateLimit-Reset-After")
+            or 5
+        )
+
+    @staticmethod
+    def _is_success(response: requests.Response) -> bool:
+        """Check whether a webhook request was accepted.
+
+        Discord answers 204 No Content; a proxy queue acknowledges with
+        other 2xx codes.
+
+        Args:
+            response: Response to a webhook request
+
+        Returns:
+            True if the message was delivered or queued
+        """
+        return 200 <= response.status_code < 300
+
+    def send_thread_notification(self, thread: ThreadRef, forum_name: str = "Forum") -> bool:
         """Send a notification for a new thread.
 
         Args:
-            thread: Thread data dictionary with keys: id, title, author, url, last_post_date
+            thread: Thread to announce
             forum_name: Name of the forum section
 
         Returns:
@@ -36,73 +223,58 @@ class DiscordNotifier:
                 "embeds": [embed]
             }
 
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self._post_with_retries(payload)
 
-            if response.status_code == 204:
-                print(f"Discord notification sent for new thread {thread['id']}")
+            if self._is_success(response):
+                logger.debug("Discord notification sent for new thread %s", thread.id)
                 return True
-            elif response.status_code == 429:
-                # Rate limited
-                retry_after = response.json().get("retry_after", 5)
-                print(f"Discord rate limit hit, waiting {retry_after}s")
-                time.sleep(retry_after)
-                # Retry once
-                response = requests.post(self.webhook_url, json=payload, timeout=10)
-                return response.status_code == 204
             else:
-                print(f"Discord notification failed: {response.status_code} - {response.text}")
+                logger.warning("Discord notification failed: %s - %s", response.status_code, response.text)
                 return False
 
         except requests.RequestException as e:
-            print(f"Error sending Discord notification: {e}")
+            logger.error("Error sending Discord notification: %s", e)
             return False
 
-    def _format_thread_embed(self, thread: Dict[str, str], forum_name: str) -> Dict:
+    def _format_thread_embed(self, thread: ThreadRef, forum_name: str) -> Dict:
         """Format a thread as a Discord embed.
 
         Args:
-            thread: Thread data dictionary
+            thread: Thread to announce
             forum_name: Name of the forum section
 
         Returns:
             Discord embed dictionary
         """
         embed = {
+            **_THREAD_EMBED_TEMPLATE,
             "title": f"🆕 New Thread in {forum_name}",
-            "description": f"**{thread.get('title', 'Untitled')}**",
-            "color": 0x57F287,  # Discord Green for new threads
-            "url": thread.get("url", ""),
+            "description": f"**{thread.title or 'Untitled'}**",
+            "url": thread.url,
             "fields": [
                 {
                     "name": "Author",
-                    "value": thread.get("author", "Unknown"),
+                    "value": thread.author or "Unknown",
                     "inline": True
                 }
-            ],
-            "footer": {
-                "text": "Foroactivo Monitor"
-            }
+            ]
         }
 
         # Add last post date if available
-        if thread.get("last_post_date"):
+        if thread.last_post_date:
             embed["fields"].append({
                 "name": "Posted",
-                "value": thread["last_post_date"],
+                "value": thread.last_post_date,
                 "inline": True
             })
 
         return embed
 
-    def send_batch_thread_notifications(self, threads: List[Dict[str, str]], forum_name: str = "Forum") -> int:
+    def send_batch_thread_notifications(self, threads: List[ThreadRef], forum_name: str = "Forum") -> int:
         """Send notifications for multiple new threads with rate limit handling.
 
         Args:
-            threads: List of thread data dictionaries
+            threads: Threads to announce
             forum_name: Name of the forum section
 
         Returns:
@@ -113,127 +285,179 @@ class DiscordNotifier:
 
         success_count = 0
 
-        for i, thread in enumerate(threads):
-            # Send notification
+        # Pacing is handled per request by the rate limiter
+        for thread in threads:
             if self.send_thread_notification(thread, forum_name):
                 success_count += 1
 
-            # Rate limit: Max 5 requests per 2 seconds
-            if (i + 1) % 4 == 0 and i + 1 < len(threads):
-                print(f"Sent {i + 1}/{len(threads)} notifications, pausing to respect rate limits...")
-                time.sleep(2)
-
-        print(f"Sent {success_count}/{len(threads)} Discord notifications successfully")
+        logger.info("Sent %d/%d Discord notifications successfully", success_count, len(threads))
         return success_count
 
-    def send_notification(self, post: Dict[str, str], thread_name: str = "Thread") -> bool:
+    def send_batch_thread_notifications_async(self, threads: List[ThreadRef], forum_name: str = "Forum") -> Future:
+        """Queue notifications for multiple new threads without waiting for them.
+
+        Args:
+            threads: Threads to announce
+            forum_name: Name of the forum section
+
+        Returns:
+            Future resolving to the number of successfully sent notifications
+        """
+        return self.executor.submit(self.send_batch_thread_notifications, threads, forum_name)
+
+    def send_notification(self, post: PostRef, thread_name: str = "Thread") -> bool:
         """Send a notification for a new post.
 
         Args:
-            post: Post data dictionary with keys: id, author, content, timestamp, url
+            post: Post to announce
             thread_name: Name of the thread
 
         Returns:
             True if notification sent successfully, False otherwise
         """
+        response = self._send_post(post, thread_name)
+        return response is not None and self._is_success(response)
+
+    def _send_post(self, post: PostRef, thread_name: str) -> Optional[requests.Response]:
+        """Post the embed for a new post, logging failures.
+
+        Args:
+            post: Post to announce
+            thread_name: Name of the thread
+
+        Returns:
+            Response to the last attempt, or None if the request failed
+        """
         try:
             embed = self._format_embed(post, thread_name)
             payload = {
                 "embeds": [embed]
             }
 
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self._post_with_retries(payload)
 
-            if response.status_code == 204:
-                print(f"Discord notification sent for post {post['id']}")
-                return True
-            elif response.status_code == 429:
-                # Rate limited
-                retry_after = response.json().get("retry_after", 5)
-                print(f"Discord rate limit hit, waiting {retry_after}s")
-                time.sleep(retry_after)
-                # Retry once
-                response = requests.post(self.webhook_url, json=payload, timeout=10)
-                return response.status_code == 204
+            if self._is_success(response):
+                logger.debug("Discord notification sent for post %s", post.id)
             else:
-                print(f"Discord notification failed: {response.status_code} - {response.text}")
-                return False
+                logger.warning("Discord notification failed: %s - %s", response.status_code, response.text)
+            return response
 
         except requests.RequestException as e:
-            print(f"Error sending Discord notification: {e}")
-            return False
+            logger.error("Error sending Discord notification: %s", e)
+            return None
+
+    @staticmethod
+    def _is_retryable(response: Optional[requests.Response]) -> bool:
+        """Check whether a failed webhook request may succeed later.
 
-    def send_batch_notifications(self, posts: List[Dict[str, str]], thread_name: str = "Thread") -> int:
+        Args:
+            response: Response to the last attempt, or None if it failed
+
+        Returns:
+            True for network errors, rate limits and server errors; False
+            for other client errors, which resending will not fix
+        """
+        return response is None or response.status_code == 429 or response.status_code >= 500
+
+    def send_batch_notifications(self, posts: Iterable[PostRef], thread_name: str = "Thread",
+                                 on_sent: Optional[Callable[[PostRef], None]] = None) -> int:
         """Send notifications for multiple posts with rate limit handling.
 
         Args:
-            posts: List of post data dictionaries
+            posts: Posts to announce, oldest first
             thread_name: Name of the thread
+            on_sent: Optional callback run after each post is handled, e.g.
+                to record progress. When given, sending stops at the first
+                retryable failure so every later post is retried on the next
+                run; posts rejected outright (other 4xx) are skipped.
 
         Returns:
             Number of successfully sent notifications
         """
-        if not posts:
-            return 0
-
         success_count = 0
+        total = 0
 
-        for i, post in enumerate(posts):
-            # Send notification
-            if self.send_notification(post, thread_name):
+        # Pacing is handled per request by the rate limiter
+        for post in posts:
+            total += 1
+            response = self._send_post(post, thread_name)
+            if response is not None and self._is_success(response):
                 success_count += 1
+                if on_sent is not None:
+                    on_sent(post)
+            elif on_sent is not None:
+                if self._is_retryable(response):
+                    logger.warning("Stopping batch at post %s; remaining posts will be retried", post.id)
+                    break
+                logger.error("Discord rejected post %s (%s); skipping it", post.id, response.status_code)
+                on_sent(post)
+
+        if total:
+            logger.info("Sent %d/%d Discord notifications successfully", success_count, total)
+        return success_count
 
-            # Rate limit: Max 5 requests per 2 seconds
-            # Add delay between posts (wait 2s after every 4 posts)
-            if (i + 1) % 4 == 0 and i + 1 < len(posts):
-                print(f"Sent {i + 1}/{len(posts)} notifications, pausing to respect rate limits...")
-                time.sleep(2)
+    def send_notification_async(self, post: PostRef, thread_name: str = "Thread") -> Future:
+        """Queue a notification for a new post without waiting for it.
 
-        print(f"Sent {success_count}/{len(posts)} Discord notifications successfully")
-        return success_count
+        Args:
+            post: Post to announce
+            thread_name: Name of the thread
+
+        Returns:
+            Future resolving to True if the notification was sent successfully
+        """
+        return self.executor.submit(self.send_notification, post, thread_name)
+
+    def send_batch_notifications_async(self, posts: Iterable[PostRef], thread_name: str = "Thread",
+                                       on_sent: Optional[Callable[[PostRef], None]] = None) -> Future:
+        """Queue notifications for multiple posts without waiting for them.
 
-    def _format_embed(self, post: Dict[str, str], thread_name: str) -> Dict:
+        Args:
+            posts: Posts to announce, oldest first
+            thread_name: Name of the thread
+            on_sent: Optional callback run after each post is delivered (see
+                send_batch_notifications)
+
+        Returns:
+            Future resolving to the number of successfully sent notifications
+        """
+        return self.executor.submit(self.send_batch_notifications, posts, thread_name, on_sent)
+
+    def _format_embed(self, post: PostRef, thread_name: str) -> Dict:
         """Format a post as a Discord embed.
 
         Args:
-            post: Post data dictionary
+            post: Post to announce
             thread_name: Name of the thread
 
         Returns:
             Discord embed dictionary
         """
         # Truncate content for preview (Discord embed description limit is 4096 chars)
-        content_preview = post.get("content", "")
+        content_preview = post.content
         if len(content_preview) > 200:
             content_preview = content_preview[:200] + "..."
 
         # Build embed
         embed = {
+            **_POST_EMBED_TEMPLATE,
             "title": f"New Reply in {thread_name}",
             "description": content_preview if content_preview else "*No content preview available*",
-            "color": self.EMBED_COLOR,
-            "url": post.get("url", ""),
+            "url": post.url,
             "fields": [
                 {
                     "name": "Author",
-                    "value": post.get("author", "Unknown"),
+                    "value": post.author or "Unknown",
                     "inline": True
                 }
-            ],
-            "footer": {
-                "text": "Foroactivo Monitor"
-            }
+            ]
         }
 
         # Add timestamp if available
-        if post.get("timestamp"):
+        if post.timestamp:
             embed["fields"].append({
                 "name": "Posted",
-                "value": post["timestamp"],
+                "value": post.timestamp,
                 "inline": True
             })
 
@@ -254,56 +478,51 @@ class DiscordNotifier:
                 "title": f"⚠️ Monitor Error - {thread_name}",
                 "description": error_message,
                 "color": 0xED4245,  # Discord Red
-                "footer": {
-                    "text": "Foroactivo Monitor"
-                }
+                "footer": _FOOTER
             }
 
             payload = {"embeds": [embed]}
 
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self._post(payload)
 
-            return response.status_code == 204
+            return self._is_success(response)
 
         except Exception as e:
-            print(f"Failed to send error notification: {e}")
+            logger.error("Failed to send error notification: %s", e)
             return False
 
     def test_webhook(self) -> bool:
         """Test if the webhook URL is valid and working.
 
+        A successful test is remembered, so repeated calls on the same
+        notifier do not post again.
+
         Returns:
             True if webhook is valid, False otherwise
         """
+        if self._webhook_validated:
+            return True
+
         try:
+            # Keep the test message minimal
             embed = {
                 "title": "✅ Foroactivo Monitor Test",
-                "description": "Webhook connection successful!",
-                "color": 0x57F287,  # Discord Green
-                "footer": {
-                    "text": "Foroactivo Monitor"
-                }
+                "description": "Webhook OK",
+                "color": 0x57F287  # Discord Green
             }
 
             payload = {"embeds": [embed]}
 
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self._post(payload)
 
-            if response.status_code == 204:
-                print("Discord webhook test successful")
+            if self._is_success(response):
+                logger.info("Discord webhook test successful")
+                self._webhook_validated = True
                 return True
             else:
-                print(f"Discord webhook test failed: {response.status_code}")
+                logger.warning("Discord webhook test failed: %s", response.status_code)
                 return False
 
         except Exception as e:
-            print(f"Discord webhook test error: {e}")
+            logger.error("Discord webhook test error: %s", e)
             return False
@@ -1,65 +1,280 @@
 """Foroactivo Forum Client - Handle authentication and thread scraping."""
 
+import hashlib
+import logging
+import pickle
 import re
-import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from .models import PageValidators, PostRef, ThreadRef, id_number
+
+logger = logging.getLogger(__name__)
+
+# lxml is a C parser, roughly an order of magnitude faster than html.parser
+HTML_PARSER = "lxml"
+
+# Patterns used while scraping, compiled once at import time
+_LOGOUT_RE = re.compile(r"/logout")
+_ERROR_RE = re.compile(r"error|message")
+_TOPIC_RE = re.compile(r"topic")
+_BY_AUTHOR_RE = re.compile(r"(?:by|par)\s+(.+?)(?:\s+»|\s*$)", re.IGNORECASE)
+_DATE_RE = re.compile(r"time|date")
+_POST_ID_RE = re.compile(r"p\d+")
+
+
+def _has_class(*names: str):
+    """Build a class_ predicate matching elements with any of the given classes.
+
+    A frozenset lookup per class name is cheaper than running a regex over
+    every element's class string. The predicate accepts a single class (as
+    passed by find/find_all) or a raw space-separated class attribute (as
+    passed by SoupStrainer while parsing).
+
+    Args:
+        names: Class names to match
+
+    Returns:
+        Predicate for BeautifulSoup's class_ argument
+    """
+    classes = frozenset(names)
+
+    def predicate(value: Optional[str]) -> bool:
+        return value is not None and not classes.isdisjoint(value.split())
+
+    return predicate
+
+
+# Class predicates for the post-parsing hot path
+_POST_CLASS = _has_class("post", "postbody", "message")
+_POST_CELL_CLASS = _has_class("post", "postbody", "postdetails", "message")
+_AUTHOR_CLASS = _has_class("author", "postauthor", "username", "postername")
+_AUTHOR_LINK_CLASS = _has_class("author", "postauthor", "username")
+_CONTENT_CLASS = _has_class("content", "postbody", "message-text")
+_TIME_CLASS = _has_class("time", "date", "postdate")
+_TIME_SPAN_CLASS = _has_class("time", "date")
+
+# Only build the parts of the page we actually scrape. Strainers see the raw
+# class attribute, so match "unr-wtp" as a whole word within it.
+THREAD_STRAINER = SoupStrainer("div", class_=re.compile(r"(?:^|\s)unr-wtp(?:\s|$)"))
+POST_STRAINER = SoupStrainer("div", class_=_POST_CLASS)
+
+# CSS selectors for the custom theme's thread containers, compiled once
+_TOPIC_NOTE_SEL = soupsieve.compile("div.unr-listopic-topic strong")
+_TOPIC_LINK_SEL = soupsieve.compile("div.unr-listopic-topic a")
+_INFO_LINK_SEL = soupsieve.compile("div.unr-listopic-info a")
+_INFO_DIVS_SEL = soupsieve.compile("div.unr-listopic-info div")
+_TOPIC_TITLE_SEL = soupsieve.compile("a.topictitle")
+
+
+def _extract_thread_id(url: str) -> Optional[str]:
+    """Extract the thread ID from a thread URL (e.g., /t31-title -> t31).
+
+    Uses plain string scanning for the fixed "/t<digits>-" shape instead of
+    running a regex for every thread on a listing.
+
+    Args:
+        url: Thread URL
+
+    Returns:
+        Thread ID or None if the URL is not a thread URL
+    """
+    start = url.find("/t")
+    while start != -1:
+        end = url.find("-", start + 2)
+        if end == -1:
+            return None
+        if url[start + 2:end].isdigit():
+            return url[start + 1:end]
+        start = url.find("/t", start + 2)
+    return None
+
+
+# Browser-like headers to avoid detection
+_BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 32) -> requests.Session:
+    """Create an HTTP session suitable for scraping forums.
+
+    The session retries transient failures and keeps pooled keep-alive
+    connections, so it can be shared by several clients (and notifiers)
+    to avoid a TCP + TLS handshake per client.
+
+    Args:
+        pool_connections: Number of hosts to keep connection pools for
+        pool_maxsize: Maximum pooled connections per host; the default covers
+            every page of a bulk scrape at once (BULK_FETCH_WORKERS *
+            PAGE_FETCH_WORKERS)
+
+    Returns:
+        Configured session
+    """
+    session = requests.Session()
+
+    # Retry transient failures with exponential backoff on every request,
+    # honouring Retry-After when the forum throttles us
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    session.headers.update(_BROWSER_HEADERS)
+    return session
 
 
 class ForoactivoClient:
     """Client for interacting with Foroactivo forums."""
 
-    def __init__(self, forum_url: str, username: str, password: str):
+    # Maximum number of thread pages fetched in parallel
+    PAGE_FETCH_WORKERS = 4
+
+    # Maximum number of threads scraped in parallel by get_threads_posts_bulk
+    BULK_FETCH_WORKERS = 8
+
+    # Page that requires a logged-in session (anonymous users are redirected)
+    AUTH_CHECK_PATH = "/profile?mode=editprofile"
+
+    def __init__(self, forum_url: str, username: str, password: str,
+                 cookie_file: Optional[Union[str, Path]] = None,
+                 session: Optional[requests.Session] = None):
         """Initialize the Foroactivo client.
 
         Args:
             forum_url: Base URL of the forum (e.g., https://example.foroactivo.com)
             username: Forum username
             password: Forum password
+            cookie_file: Optional file used to persist session cookies between
+                runs, so a still-valid session can skip logging in again
+            session: Optional shared session (see create_session); a new one
+                is created if not given
         """
         self.forum_url = forum_url.rstrip("/")
         self.username = username
         self.password = password
-        self.session = requests.Session()
-
-        # Browser-like headers to avoid detection
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        })
+        self.cookie_file = Path(cookie_file) if cookie_file else None
+        self.session = session if session is not None else create_session()
 
-    def login(self) -> bool:
-        """Authenticate with the forum.
+        # Login form action, cached so a re-login skips fetching the login page
+        self._form_action: Optional[str] = None
+
+        # Total posts per thread as of the last fetch
+        self._post_count_by_url: Dict[str, int] = {}
+
+        self._load_cookies()
+
+    def _load_cookies(self) -> bool:
+        """Load persisted session cookies, if any.
 
         Returns:
-            True if login successful, False otherwise
+            True if cookies were loaded, False otherwise
         """
+        if not self.cookie_file or not self.cookie_file.exists():
+            return False
+
         try:
-            # Get login page to extract form data
-            login_page_url = urljoin(self.forum_url, "/login")
-            response = self.session.get(login_page_url, timeout=30)
-            response.raise_for_status()
+            with open(self.cookie_file, "rb") as f:
+                self.session.cookies.update(pickle.load(f))
+            return True
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning("Could not load saved session cookies: %s", e)
+            return False
 
-            soup = BeautifulSoup(response.content, "html.parser")
+    def _save_cookies(self) -> None:
+        """Persist the session cookies for the next run."""
+        if not self.cookie_file:
+            return
 
-            # Find login form
-            login_form = soup.find("form", {"method": "post"})
-            if not login_form:
-                print("Error: Could not find login form")
-                return False
+        try:
+            self.cookie_file.parent.mkdir(parents=True, exist_ok=True)
+            # The session may be shared with other forums; keep only ours
+            host = urlparse(self.forum_url).hostname or ""
+            cookies = requests.cookies.RequestsCookieJar()
+            for cookie in self.session.cookies:
+                if host.endswith(cookie.domain.lstrip(".")):
+                    cookies.set_cookie(cookie)
+
+            with open(self.cookie_file, "wb") as f:
+                pickle.dump(cookies, f)
+        except OSError as e:
+            logger.warning("Could not save session cookies: %s", e)
+
+    def ensure_logged_in(self) -> bool:
+        """Make sure the session is authenticated, logging in only if needed.
+
+        With saved cookies, a lightweight HEAD request to a page that requires
+        authentication tells whether the session is still valid; only when it
+        is not (or there are no cookies) is a full login performed.
 
-            # Extract form action
-            form_action = login_form.get("action", "/login")
-            if not form_action.startswith("http"):
-                form_action = urljoin(self.forum_url, form_action)
+        Returns:
+            True if the session is authenticated, False otherwise
+        """
+        if self.session.cookies:
+            try:
+                response = self.session.head(
+                    urljoin(self.forum_url, self.AUTH_CHECK_PATH),
+                    timeout=30,
+                    allow_redirects=False
+                )
+                if response.status_code == 200:
+                    logger.info("Reusing saved session for %s", self.username)
+                    return True
+            except requests.RequestException as e:
+                logger.warning("Session check failed: %s", e)
+
+        return self.login()
+
+    def login(self) -> bool:
+        """Authenticate with the forum.
+
+        Returns:
+            True if login successful, False otherwise
+        """
+        try:
+            form_action = self._form_action
+            if not form_action:
+                # Get login page to extract form data
+                login_page_url = urljoin(self.forum_url, "/login")
+                soup = BeautifulSoup(self._get_page(login_page_url), HTML_PARSER)
+
+                # Find login form
+                login_form = soup.find("form", {"method": "post"})
+                if not login_form:
+                    logger.error("Could not find login form")
+                    return False
+
+                # Extract form action
+                form_action = login_form.get("action", "/login")
+                if not form_action.startswith("http"):
+                    form_action = urljoin(self.forum_url, form_action)
+                self._form_action = form_action
 
             # Build login payload
             payload = {
@@ -71,59 +286,83 @@ class ForoactivoClient:
             }
 
             # Submit login
-            response = self.session.post(form_action, data=payload, timeout=30, allow_redirects=True)
+            response = self.session.post(form_action, data=payload, timeout=30)
             response.raise_for_status()
 
             # Check if login was successful by looking for logout link
-            soup = BeautifulSoup(response.content, "html.parser")
-            logout_link = soup.find("a", href=re.compile(r"/logout"))
+            soup = BeautifulSoup(response.content, HTML_PARSER)
+            logout_link = soup.find("a", href=_LOGOUT_RE)
 
             if logout_link:
-                print(f"Successfully logged in as {self.username}")
+                logger.info("Successfully logged in as %s", self.username)
+                self._save_cookies()
                 return True
             else:
                 # Debug: Check for common login error indicators
-                error_msg = soup.find(class_=re.compile(r"error|message"))
+                error_msg = soup.find(class_=_ERROR_RE)
                 if error_msg:
-                    print(f"Login failed with error: {error_msg.get_text(strip=True)}")
+                    logger.error("Login failed with error: %s", error_msg.get_text(strip=True))
                 else:
-                    print("Login failed: No logout link found")
+                    logger.warning("Login failed: No logout link found")
                     # Check if username appears in page (might be logged in under different selector)
                     if self.username.lower() in response.text.lower():
-                        print("Username found in page - might be logged in but logout link selector is different")
-                        print("Proceeding anyway...")
+                        logger.warning(
+                            "Username found in page - might be logged in but logout link "
+                            "selector is different. Proceeding anyway..."
+                        )
+                        self._save_cookies()
                         return True
                 return False
 
         except requests.RequestException as e:
-            print(f"Login error: {e}")
+            logger.error("Login error: %s", e)
             return False
 
-    def get_forum_threads(self, forum_url: str) -> List[Dict[str, str]]:
+    def get_forum_threads(self, forum_url: str, validators: Optional[PageValidators] = None
+                          ) -> Tuple[Optional[List[ThreadRef]], PageValidators]:
         """Fetch all threads from a forum section.
 
+        With validators from a previous fetch the request is conditional, so
+        an unchanged section costs no download or parse; a body identical to
+        the one the content hash was taken from is not parsed again either.
+        Validators are passed in and returned rather than cached, since
+        several monitors may watch the same section from different states.
+
         Args:
             forum_url: Full URL of the forum section (e.g., https://forum.com/f13-section)
+            validators: Validators returned by the caller's previous fetch
 
         Returns:
-            List of thread dictionaries with keys: id, title, author, url, last_post_date
+            (threads, validators) tuple: ThreadRef records in listing order,
+            or None if the section is unchanged since that fetch, and the
+            validators to pass next time
         """
+        validators = validators or PageValidators()
         try:
-            response = self.session.get(forum_url, timeout=30)
-            response.raise_for_status()
+            content, fetched = self._get_page_with_validators(forum_url, validators)
+            if content is None:
+                logger.info("Forum section not modified since last run")
+                return None, validators
+
+            content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+            fetched = replace(fetched, content_hash=content_hash)
+            if content_hash == validators.content_hash:
+                logger.info("Forum section content unchanged, skipping parse")
+                return None, fetched
 
-            soup = BeautifulSoup(response.content, "html.parser")
             threads = []
 
             # Find all thread/topic containers
             # This forum uses a custom theme, so look for thread containers
+            soup = BeautifulSoup(content, HTML_PARSER, parse_only=THREAD_STRAINER)
             thread_containers = soup.find_all("div", class_="unr-wtp")
 
             if not thread_containers:
-                # Fallback to standard phpBB structure
-                thread_containers = soup.find_all("dl", class_=re.compile(r"topic"))
+                # Fallback to standard phpBB structure, which needs the full page
+                soup = BeautifulSoup(content, HTML_PARSER)
+                thread_containers = soup.find_all("dl", class_=_TOPIC_RE)
 
-            print(f"Found {len(thread_containers)} thread container(s)")
+            logger.debug("Found %d thread container(s)", len(thread_containers))
 
             for container in thread_containers:
                 thread_data = self._parse_thread_from_custom_theme(container, forum_url)
@@ -131,17 +370,17 @@ class ForoactivoClient:
                     threads.append(thread_data)
 
             if not threads:
-                print(f"Warning: No threads found in forum section {forum_url}")
+                logger.warning("No threads found in forum section %s", forum_url)
             else:
-                print(f"Found {len(threads)} thread(s) in forum section")
+                logger.info("Found %d thread(s) in forum section", len(threads))
 
-            return threads
+            return threads, fetched
 
         except requests.RequestException as e:
-            print(f"Error fetching forum section: {e}")
-            return []
+            logger.error("Error fetching forum section: %s", e)
+            return [], validators
 
-    def _parse_thread_from_custom_theme(self, container, base_url: str) -> Optional[Dict[str, str]]:
+    def _parse_thread_from_custom_theme(self, container, base_url: str) -> Optional[ThreadRef]:
         """Parse a thread from the custom theme structure.
 
         Args:
@@ -149,23 +388,17 @@ class ForoactivoClient:
             base_url: Base URL for constructing full URLs
 
         Returns:
-            Dictionary with thread data or None if parsing fails
+            ThreadRef with the thread data or None if parsing fails
         """
         try:
-            # Find the topic link (not within a <strong>Nota:</strong> for pinned topics)
-            topic_div = container.find("div", class_="unr-listopic-topic")
-            if not topic_div:
-                return None
-
             # Check if it's a pinned note (skip those)
-            if topic_div.find("strong"):
-                strong_text = topic_div.find("strong").get_text(strip=True)
-                if "Nota" in strong_text:
-                    print("Skipping pinned note")
-                    return None
+            note = _TOPIC_NOTE_SEL.select_one(container)
+            if note and "Nota" in note.get_text(strip=True):
+                logger.debug("Skipping pinned note")
+                return None
 
             # Get the thread link
-            link = topic_div.find("a")
+            link = _TOPIC_LINK_SEL.select_one(container)
             if not link:
                 return None
 
@@ -177,47 +410,40 @@ class ForoactivoClient:
                 thread_url = urljoin(base_url, thread_url)
 
             # Extract thread ID
-            thread_id = None
-            if thread_url:
-                match = re.search(r'/t(\d+)-', thread_url)
-                if match:
-                    thread_id = f"t{match.group(1)}"
+            thread_id = _extract_thread_id(thread_url)
 
             if not thread_id:
                 return None
 
             # Find author
             author = "Unknown"
-            info_div = container.find("div", class_="unr-listopic-info")
-            if info_div:
-                author_link = info_div.find("a")
-                if author_link:
-                    author = author_link.get_text(strip=True)
+            author_link = _INFO_LINK_SEL.select_one(container)
+            if author_link:
+                author = author_link.get_text(strip=True)
 
             # Find last post date (last div in info)
             last_post_date = ""
-            if info_div:
-                date_divs = info_div.find_all("div")
-                if len(date_divs) >= 3:
-                    # Third div contains the date
-                    last_post_date = date_divs[2].get_text(strip=True)
-                    # Remove the username that appears after the date
-                    if "por" in last_post_date:
-                        last_post_date = last_post_date.split("por")[0].strip()
-
-            return {
-                "id": thread_id,
-                "title": title,
-                "author": author,
-                "url": thread_url,
-                "last_post_date": last_post_date
-            }
+            date_divs = _INFO_DIVS_SEL.select(container)
+            if len(date_divs) >= 3:
+                # Third div contains the date
+                last_post_date = date_divs[2].get_text(strip=True)
+                # Remove the username that appears after the date
+                if "por" in last_post_date:
+                    last_post_date = last_post_date.split("por")[0].strip()
+
+            return ThreadRef(
+                id=thread_id,
+                title=title,
+                author=author,
+                url=thread_url,
+                last_post_date=last_post_date,
+            )
 
         except Exception as e:
-            print(f"Error parsing thread from custom theme: {e}")
+            logger.warning("Error parsing thread from custom theme: %s", e)
             return None
 
-    def _parse_thread(self, thread_elem, base_url: str) -> Optional[Dict[str, str]]:
+    def _parse_thread(self, thread_elem, base_url: str) -> Optional[ThreadRef]:
         """Parse a thread element from forum listing.
 
         Args:
@@ -225,11 +451,11 @@ class ForoactivoClient:
             base_url: Base URL for constructing full URLs
 
         Returns:
-            Dictionary with thread data or None if parsing fails
+            ThreadRef with the thread data or None if parsing fails
         """
         try:
             # Find title and URL
-            title_link = thread_elem.find("a", class_="topictitle")
+            title_link = _TOPIC_TITLE_SEL.select_one(thread_elem)
             if not title_link:
                 return None
 
@@ -242,11 +468,7 @@ class ForoactivoClient:
                 thread_url = urljoin(base_url, thread_url)
 
             # Extract thread ID from URL (e.g., /t31-title -> t31)
-            thread_id = None
-            if thread_url:
-                match = re.search(r'/t(\d+)-', thread_url)
-                if match:
-                    thread_id = f"t{match.group(1)}"
+            thread_id = _extract_thread_id(thread_url)
 
             if not thread_id:
                 return None
@@ -257,7 +479,7 @@ class ForoactivoClient:
             if dt_elem:
                 # Look for text after "by" or "par"
                 text = dt_elem.get_text()
-                by_match = re.search(r'(?:by|par)\s+(.+?)(?:\s+»|\s*$)', text, re.IGNORECASE)
+                by_match = _BY_AUTHOR_RE.search(text)
                 if by_match:
                     author = by_match.group(1).strip()
 
@@ -265,66 +487,311 @@ class ForoactivoClient:
             dd_elem = thread_elem.find("dd")
             last_post_date = ""
             if dd_elem:
-                time_elem = dd_elem.find(class_=re.compile(r"time|date"))
+                time_elem = dd_elem.find(class_=_DATE_RE)
                 if time_elem:
                     last_post_date = time_elem.get_text(strip=True)
                 else:
                     # Try to get any date-like text
                     last_post_date = dd_elem.get_text(strip=True)
 
-            return {
-                "id": thread_id,
-                "title": title,
-                "author": author,
-                "url": thread_url,
-                "last_post_date": last_post_date
-            }
+            return ThreadRef(
+                id=thread_id,
+                title=title,
+                author=author,
+                url=thread_url,
+                last_post_date=last_post_date,
+            )
 
         except Exception as e:
-            print(f"Error parsing thread: {e}")
+            logger.warning("Error parsing thread: %s", e)
             return None
 
-    def get_thread_posts(self, thread_url: str) -> List[Dict[str, str]]:
-        """Fetch all posts from a thread.
+    def get_thread_posts(self, thread_url: str, stop_at_id: Optional[str] = None,
+                         newest_page_only: bool = False) -> List[PostRef]:
+        """Fetch posts from a thread, following its pagination.
+
+        The first page is fetched to discover how many pages the thread has.
+        Without stop_at_id the remaining pages are then fetched in parallel.
+        With it, pages are fetched newest first (a batch at a time) until one
+        reaches the known post, so only the tail of the thread is downloaded.
+        With newest_page_only, only the first and last pages are fetched.
 
         Args:
             thread_url: Full URL of the thread to scrape
+            stop_at_id: ID of the last post already seen, if any
+            newest_page_only: Return only the posts on the last page, e.g.
+                when a thread is tracked for the first time
 
         Returns:
-            List of post dictionaries with keys: id, author, content, timestamp, url
+            List of PostRef records in thread order; with stop_at_id, only
+            the pages from the one holding that post onwards, and with
+            newest_page_only, only the last page
         """
         try:
-            response = self.session.get(thread_url, timeout=30)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-            posts = []
-
-            # Find all post elements (Foroactivo uses various templates)
-            # Try phpBB3 style first
-            post_elements = soup.find_all("div", class_=re.compile(r"post\s|postbody|message"))
+            content = self._get_page(thread_url)
+            first_page = self._parse_posts(content, thread_url)
+            page_urls = self._get_thread_page_urls(content, thread_url)
+
+            if not page_urls:
+                pages = [first_page]
+            elif newest_page_only:
+                pages = [self._fetch_page_posts(page_urls[-1])]
+            elif stop_at_id is None:
+                # Fetch further pages concurrently (I/O bound, so threads suffice)
+                logger.info("Thread spans %d pages, fetching remaining pages...", len(page_urls) + 1)
+                with ThreadPoolExecutor(max_workers=self.PAGE_FETCH_WORKERS) as executor:
+                    pages = [first_page, *executor.map(self._fetch_page_posts, page_urls)]
+            else:
+                pages, found = self._fetch_pages_until(page_urls, stop_at_id)
+                if found:
+                    logger.info(
+                        "Thread spans %d pages, fetched the newest %d",
+                        len(page_urls) + 1, len(pages)
+                    )
+                else:
+                    pages.insert(0, first_page)
 
-            # If not found, try alternative selectors
-            if not post_elements:
-                post_elements = soup.find_all("td", class_=re.compile(r"post|message"))
+            posts = [post for page_posts in pages for post in page_posts]
 
-            for post_elem in post_elements:
-                post_data = self._parse_post(post_elem, thread_url)
-                if post_data:
-                    posts.append(post_data)
+            # Every page but the last holds as many posts as the first one
+            self._post_count_by_url[thread_url] = len(first_page) * len(page_urls) + len(pages[-1])
 
             if not posts:
-                print(f"Warning: No posts found in thread {thread_url}")
+                logger.warning("No posts found in thread %s", thread_url)
             else:
-                print(f"Found {len(posts)} posts in thread")
+                logger.info("Found %d posts in thread", len(posts))
 
             return posts
 
         except requests.RequestException as e:
-            print(f"Error fetching thread: {e}")
+            logger.error("Error fetching thread: %s", e)
+            return []
+
+    def _fetch_pages_until(self, page_urls: List[str],
+                           stop_at_id: str) -> Tuple[List[List[PostRef]], bool]:
+        """Fetch thread pages newest first until one reaches a known post.
+
+        Pages are fetched in parallel batches of PAGE_FETCH_WORKERS. A page
+        reaches the post if it contains it or, in case it was deleted, any
+        post numbered below it.
+
+        Args:
+            page_urls: URLs of the thread pages after the first, in order
+            stop_at_id: ID of the last post already seen
+
+        Returns:
+            (pages, found) tuple: the posts of each fetched page, in thread
+            order, and whether the known post was reached
+        """
+        stop_number = id_number(stop_at_id)
+        pages: List[List[PostRef]] = []
+        remaining = list(page_urls)
+
+        with ThreadPoolExecutor(max_workers=self.PAGE_FETCH_WORKERS) as executor:
+            while remaining:
+                batch = remaining[-self.PAGE_FETCH_WORKERS:]
+                del remaining[-self.PAGE_FETCH_WORKERS:]
+                batch_pages = list(executor.map(self._fetch_page_posts, batch))
+                pages[:0] = batch_pages
+
+                for page_posts in batch_pages:
+                    for post in page_posts:
+                        if post.id == stop_at_id or (
+                            stop_number is not None and post.number is not None
+                            and post.number <= stop_number
+                        ):
+                            return pages, True
+
+        return pages, False
+
+    def get_post_count(self, thread_url: str) -> Optional[int]:
+        """Get the number of posts a thread had when it was last fetched.
+
+        This counts the whole thread even when get_thread_posts only
+        returned its newest pages.
+
+        Args:
+            thread_url: URL passed to get_thread_posts
+
+        Returns:
+            Number of posts, or None if the thread was not fetched yet
+        """
+        return self._post_count_by_url.get(thread_url)
+
+    def get_threads_posts_bulk(self, thread_urls: List[str]) -> Dict[str, List[PostRef]]:
+        """Fetch all posts from several threads in parallel.
+
+        Args:
+            thread_urls: Full URLs of the threads to scrape
+
+        Returns:
+            Dictionary mapping each thread URL to its list of PostRef records
+        """
+        # The session's connection pool is thread-safe, so workers share it
+        with ThreadPoolExecutor(max_workers=self.BULK_FETCH_WORKERS) as executor:
+            return dict(zip(thread_urls, executor.map(self.get_thread_posts, thread_urls)))
+
+    def _fetch_page_posts(self, page_url: str) -> List[PostRef]:
+        """Fetch a single thread page and parse its posts.
+
+        Args:
+            page_url: URL of the thread page
+
+        Returns:
+            List of PostRef records in page order
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        return self._parse_posts(self._get_page(page_url), page_url)
+
+    def _get_page(self, url: str) -> bytes:
+        """Fetch the body of a page.
+
+        Args:
+            url: URL of the page to fetch
+
+        Returns:
+            Decompressed page body
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        content, _ = self._get_page_with_validators(url)
+        return content
+
+    def _get_page_with_validators(self, url: str, validators: Optional[PageValidators] = None
+                                  ) -> Tuple[Optional[bytes], PageValidators]:
+        """Fetch the body of a page, revalidating a previously fetched copy.
+
+        The response is streamed and decompressed straight from the socket
+        into a single buffer, skipping the chunked copy requests builds for
+        response.content. Callers parse the bytes more than once (strainer,
+        fallback, pagination scan), so the body is returned rather than the
+        raw stream.
+
+        Args:
+            url: URL of the page to fetch
+            validators: ETag / Last-Modified of the copy the caller has; they
+                are sent as If-None-Match / If-Modified-Since so an unchanged
+                page costs no body
+
+        Returns:
+            (body, validators) tuple: the decompressed body, or None if the
+            page was not modified, and the response's ETag / Last-Modified
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        headers = {}
+        if validators is not None:
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+
+        with self.session.get(url, timeout=30, stream=True, headers=headers) as response:
+            if response.status_code == 304 and headers:
+                return None, validators
+            response.raise_for_status()
+
+            fetched = PageValidators(
+                etag=response.headers.get("ETag") or None,
+                last_modified=response.headers.get("Last-Modified") or None,
+            )
+
+            # Reading the raw stream bypasses requests' exception wrapping,
+            # so map urllib3 errors the same way response.content would
+            try:
+                return response.raw.read(decode_content=True), fetched
+            except ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e) from e
+            except DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e) from e
+            except ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e) from e
+
+    def _get_thread_page_urls(self, html: bytes, thread_url: str) -> List[str]:
+        """Build the URLs of every page of a thread after the first one.
+
+        Foroactivo paginates threads as /t123p15-title, /t123p30-title, ...
+        where the number after "p" is the offset of the first post on the page.
+        The pagination bar may elide middle pages, so the URLs are generated
+        from the page size and the highest offset linked from the first page.
+        Links are read straight from the HTML so the page can be parsed with
+        a post-only strainer.
+
+        Args:
+            html: HTML of the first page of the thread
+            thread_url: URL of the first page of the thread
+
+        Returns:
+            List of page URLs in order (empty for single-page threads)
+        """
+        thread_id = _extract_thread_id(thread_url)
+        if not thread_id:
             return []
 
-    def _parse_post(self, post_elem, thread_url: str) -> Optional[Dict[str, str]]:
+        topic_id = thread_id[1:]
+        offset_pattern = re.compile(rb'/t%sp(\d+)-' % topic_id.encode())
+
+        offsets = {int(offset) for offset in offset_pattern.findall(html)}
+        offsets.discard(0)
+
+        if not offsets:
+            return []
+
+        page_size = min(offsets)
+        return [
+            thread_url.replace(f"/t{topic_id}-", f"/t{topic_id}p{offset}-", 1)
+            for offset in range(page_size, max(offsets) + 1, page_size)
+        ]
+
+    def _parse_posts(self, content: bytes, page_url: str) -> List[PostRef]:
+        """Parse all posts on a thread page.
+
+        Args:
+            content: Raw HTML of the thread page
+            page_url: URL of the page (for constructing post URLs)
+
+        Returns:
+            List of PostRef records in page order
+        """
+        # Find all post elements (Foroactivo uses various templates)
+        # Try phpBB3 style first
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=POST_STRAINER)
+        posts = self._parse_post_elements(soup.find_all("div", class_=_POST_CLASS), page_url)
+
+        # The strainer drops ancestors, so templates that put the post ID on a
+        # wrapping row or table need the full page (as do alternative selectors)
+        if not posts:
+            soup = BeautifulSoup(content, HTML_PARSER)
+            post_elements = soup.find_all("div", class_=_POST_CLASS)
+            if not post_elements:
+                post_elements = soup.find_all("td", class_=_POST_CELL_CLASS)
+            posts = self._parse_post_elements(post_elements, page_url)
+
+        return posts
+
+    def _parse_post_elements(self, post_elements, page_url: str) -> List[PostRef]:
+        """Parse post elements, skipping those without a post ID.
+
+        Args:
+            post_elements: BeautifulSoup elements containing posts
+            page_url: URL of the page (for constructing post URLs)
+
+        Returns:
+            List of PostRef records in page order
+        """
+        posts = []
+        for post_elem in post_elements:
+            post_data = self._parse_post(post_elem, page_url)
+            if post_data:
+                posts.append(post_data)
+
+        return posts
+
+    def _parse_post(self, post_elem, thread_url: str) -> Optional[PostRef]:
         """Parse a post element to extract data.
 
         Args:
@@ -332,19 +799,19 @@ class ForoactivoClient:
             thread_url: URL of the thread (for constructing post URLs)
 
         Returns:
-            Dictionary with post data or None if parsing fails
+            PostRef with the post data or None if parsing fails
         """
         try:
             # Extract post ID from element attributes
             post_id = None
             if post_elem.get("id"):
                 post_id = post_elem.get("id")
-            elif post_elem.find_parent(id=re.compile(r"p\d+")):
-                post_id = post_elem.find_parent(id=re.compile(r"p\d+")).get("id")
+            elif post_elem.find_parent(id=_POST_ID_RE):
+                post_id = post_elem.find_parent(id=_POST_ID_RE).get("id")
 
             if not post_id:
                 # Try to find anchor with post ID
-                anchor = post_elem.find("a", id=re.compile(r"p\d+"))
+                anchor = post_elem.find("a", id=_POST_ID_RE)
                 if anchor:
                     post_id = anchor.get("id")
 
@@ -354,15 +821,15 @@ class ForoactivoClient:
 
             # Extract author
             author = "Unknown"
-            author_elem = post_elem.find(class_=re.compile(r"author|username|postername"))
+            author_elem = post_elem.find(class_=_AUTHOR_CLASS)
             if not author_elem:
-                author_elem = post_elem.find("a", class_=re.compile(r"author|username"))
+                author_elem = post_elem.find("a", class_=_AUTHOR_LINK_CLASS)
             if author_elem:
                 author = author_elem.get_text(strip=True)
 
             # Extract content
             content = ""
-            content_elem = post_elem.find(class_=re.compile(r"content|postbody|message-text"))
+            content_elem = post_elem.find(class_=_CONTENT_CLASS)
             if content_elem:
                 # Get text, preserving some structure
                 content = content_elem.get_text(separator=" ", strip=True)
@@ -372,49 +839,24 @@ class ForoactivoClient:
 
             # Extract timestamp
             timestamp = ""
-            time_elem = post_elem.find(class_=re.compile(r"time|date|postdate"))
+            time_elem = post_elem.find(class_=_TIME_CLASS)
             if not time_elem:
-                time_elem = post_elem.find("span", class_=re.compile(r"time|date"))
+                time_elem = post_elem.find("span", class_=_TIME_SPAN_CLASS)
             if time_elem:
                 timestamp = time_elem.get_text(strip=True)
 
             # Construct post URL
             post_url = f"{thread_url}#{post_id}"
 
-            return {
-                "id": post_id,
-                "author": author,
-                "content": content,
-                "timestamp": timestamp,
-                "url": post_url
-            }
+            return PostRef(
+                id=post_id,
+                author=author,
+                content=content,
+                timestamp=timestamp,
+                url=post_url,
+                number=id_number(post_id),
+            )
 
         except Exception as e:
-            print(f"Error parsing post: {e}")
+            logger.warning("Error parsing post: %s", e)
             return None
-
-    def retry_request(self, url: str, max_retries: int = 3) -> Optional[requests.Response]:
-        """Make a request with exponential backoff retry logic.
-
-        Args:
-            url: URL to request
-            max_retries: Maximum number of retry attempts
-
-        Returns:
-            Response object or None if all retries failed
-        """
-        for attempt in range(max_retries):
-            try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return response
-            except requests.RequestException as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    print(f"Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                    print(f"Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"Request failed after {max_retries} attempts: {e}")
-                    return None
-        return None
@@ -0,0 +1,75 @@
+"""Data Models - Lightweight records for scraped threads, posts and monitors."""
+
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+
+def id_number(item_id: str) -> Optional[int]:
+    """Get the numeric part of a Foroactivo thread or post ID, if any.
+
+    Args:
+        item_id: ID such as "t31" (thread) or "p33" (post)
+
+    Returns:
+        The number after the one-letter prefix (e.g. 31), or None
+    """
+    digits = item_id[1:]
+    return int(digits) if digits.isdigit() else None
+
+
+@dataclass(frozen=True, slots=True)
+class ThreadRef:
+    """A thread as listed in a forum section."""
+
+    id: str
+    title: str
+    author: str
+    url: str
+    last_post_date: str
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the thread as a plain dictionary (the pre-1.1 payload)."""
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class PostRef:
+    """A single post inside a thread."""
+
+    id: str
+    author: str
+    content: str
+    timestamp: str
+    url: str
+    # Numeric part of the ID, parsed once; post numbers grow with post order
+    number: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the post as a plain dictionary (the pre-1.1 payload)."""
+        payload = asdict(self)
+        del payload["number"]
+        return payload
+
+
+@dataclass(frozen=True, slots=True)
+class PageValidators:
+    """What a fetch of a page leaves behind to revalidate it next time."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Hash of the last parsed body, for servers that send no validators
+    content_hash: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class MonitorSpec:
+    """A validated monitor entry from the configuration file."""
+
+    id: str
+    name: str
+    type: str  # "forum" or "thread"
+    forum_url: str
+    webhook_url: Optional[str]
+    section_url: Optional[str] = None
+    thread_url: Optional[str] = None
+    enabled: bool = True
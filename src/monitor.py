@@ -1,39 +1,66 @@
 """Main Monitor - Orchestrate forum monitoring and Discord notifications."""
 
-import json
+import logging
+import logging.handlers
 import os
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
+import orjson
 from dotenv import load_dotenv
 
 from .discord_notifier import DiscordNotifier
-from .foroactivo_client import ForoactivoClient
+from .foroactivo_client import ForoactivoClient, create_session
+from .models import MonitorSpec
 from .state_manager import StateManager
 
+logger = logging.getLogger(__name__)
+
+# Whether .env has been loaded into the environment by this process
+_ENV_LOADED = False
+
+
+def _ensure_env() -> None:
+    """Load variables from .env into the environment, only on first call."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        load_dotenv()
+        _ENV_LOADED = True
+
 
 class ForoactivoMonitor:
     """Main monitor orchestrator."""
 
+    # Upper bound on monitors processed at once, to avoid hammering the forum
+    MONITOR_WORKERS = 8
+
     def __init__(self, config_file: str = "config/threads.json"):
         """Initialize the monitor.
 
         Args:
             config_file: Path to the configuration file
         """
-        # Load environment variables
-        load_dotenv()
+        # Load environment variables (parsed once per process)
+        _ensure_env()
 
         # Resolve paths relative to project root
         project_root = Path(__file__).parent.parent
         self.config_file = project_root / config_file
 
+        # Saved forum session cookies, one file per forum host
+        self.cookie_dir = project_root / ".cookies"
+
         # Initialize state manager
         self.state_manager = StateManager()
 
-        # Load configuration
+        # Load configuration and validate each monitor once
         self.config = self._load_config()
+        self.monitors = self._parse_monitors(self.config)
 
         # Get forum credentials from environment
         self.username = os.getenv("FOROACTIVO_USERNAME")
@@ -42,6 +69,21 @@ class ForoactivoMonitor:
         if not self.username or not self.password:
             raise ValueError("FOROACTIVO_USERNAME and FOROACTIVO_PASSWORD environment variables must be set")
 
+        # Optional Discord webhook proxy that queues messages and handles rate limits
+        self.webhook_proxy = os.getenv("DISCORD_WEBHOOK_PROXY")
+
+        # One HTTP session for every client and notifier, so connections to
+        # each host are pooled and kept alive across monitors
+        self.session = create_session()
+
+        # Clients and notifiers shared by every monitor of the same forum or
+        # webhook, so each host is logged in to once and keeps one pool
+        self._clients: Dict[str, ForoactivoClient] = {}
+        self._notifiers: Dict[str, DiscordNotifier] = {}
+        self._clients_lock = threading.Lock()
+        self._client_locks: Dict[str, threading.Lock] = {}
+        self._notifiers_lock = threading.Lock()
+
     def _load_config(self) -> Dict:
         """Load configuration from file.
 
@@ -55,18 +97,122 @@ class ForoactivoMonitor:
             )
 
         try:
-            with open(self.config_file, "r", encoding="utf-8") as f:
-                config = json.load(f)
+            config = orjson.loads(self.config_file.read_bytes())
 
             if "monitors" not in config:
                 raise ValueError("Configuration must have a 'monitors' array")
 
-            print(f"Loaded configuration with {len(config['monitors'])} monitor(s)")
+            logger.info("Loaded configuration with %d monitor(s)", len(config["monitors"]))
             return config
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in configuration file: {e}")
 
+    @staticmethod
+    def _parse_monitors(config: Dict) -> List[MonitorSpec]:
+        """Validate the configured monitors and resolve their webhook URLs.
+
+        Args:
+            config: Configuration dictionary
+
+        Returns:
+            List of monitor specs in configuration order
+
+        Raises:
+            ValueError: If an enabled monitor is missing a required field or
+                its webhook environment variable is not set
+        """
+        monitors = []
+        # Monitors often share a webhook, so read each variable only once
+        webhooks: Dict[str, Optional[str]] = {}
+        for entry in config["monitors"]:
+            monitor_id = entry.get("id")
+            monitor_type = "forum" if entry.get("type", "thread") == "forum" else "thread"
+            url_field = "section_url" if monitor_type == "forum" else "thread_url"
+            webhook_env = entry.get("discord_webhook_env", "DISCORD_WEBHOOK_URL")
+            enabled = entry.get("enabled", True)
+
+            # Disabled monitors may be incomplete placeholders
+            if enabled:
+                if not all([monitor_id, entry.get("forum_url"), webhook_env]):
+                    raise ValueError(f"Incomplete configuration for monitor {monitor_id}")
+                if not entry.get(url_field):
+                    raise ValueError(f"{url_field} required for {monitor_type} monitor {monitor_id}")
+
+            if webhook_env and webhook_env not in webhooks:
+                webhooks[webhook_env] = os.getenv(webhook_env)
+            webhook_url = webhooks.get(webhook_env)
+
+            if enabled and not webhook_url:
+                raise ValueError(f"Environment variable {webhook_env} not set for monitor {monitor_id}")
+
+            monitors.append(MonitorSpec(
+                id=monitor_id,
+                name=entry.get("name", monitor_type.capitalize()),
+                type=monitor_type,
+                forum_url=entry.get("forum_url"),
+                webhook_url=webhook_url,
+                section_url=entry.get("section_url"),
+                thread_url=entry.get("thread_url"),
+                enabled=enabled,
+            ))
+
+        return monitors
+
+    def _cookie_file(self, forum_url: str) -> Path:
+        """Get the file holding saved session cookies for a forum.
+
+        Args:
+            forum_url: Base URL of the forum
+
+        Returns:
+            Path of the cookie file for the forum's host
+        """
+        return self.cookie_dir / f"{urlparse(forum_url).netloc}.pickle"
+
+    def _get_client(self, forum_url: str) -> Optional[ForoactivoClient]:
+        """Get the logged-in client for a forum, creating it on first use.
+
+        Args:
+            forum_url: Base URL of the forum
+
+        Returns:
+            Authenticated client, or None if authentication failed
+        """
+        # Monitors of one forum wait for a single login; other forums log in
+        # concurrently, so the shared lock only guards the per-forum locks
+        with self._clients_lock:
+            forum_lock = self._client_locks.setdefault(forum_url, threading.Lock())
+
+        with forum_lock:
+            client = self._clients.get(forum_url)
+            if client is None:
+                client = ForoactivoClient(
+                    forum_url, self.username, self.password, self._cookie_file(forum_url),
+                    session=self.session
+                )
+                logger.info("Authenticating to %s...", forum_url)
+                if not client.ensure_logged_in():
+                    return None
+                self._clients[forum_url] = client
+            return client
+
+    def _get_notifier(self, webhook_url: str) -> DiscordNotifier:
+        """Get the notifier for a webhook, creating it on first use.
+
+        Args:
+            webhook_url: Discord webhook URL
+
+        Returns:
+            Notifier shared by all monitors posting to the webhook
+        """
+        with self._notifiers_lock:
+            notifier = self._notifiers.get(webhook_url)
+            if notifier is None:
+                notifier = DiscordNotifier(webhook_url, self.webhook_proxy, session=self.session)
+                self._notifiers[webhook_url] = notifier
+            return notifier
+
     def run(self) -> int:
         """Run the monitoring process.
 
@@ -74,249 +220,252 @@ class ForoactivoMonitor:
             Exit code (0 for success, 1 for error)
         """
         try:
-            print("=" * 60)
-            print("Foroactivo Discord Monitor - Starting")
-            print("=" * 60)
+            logger.info("=" * 60)
+            logger.info("Foroactivo Discord Monitor - Starting")
+            logger.info("=" * 60)
 
             # Load state
             self.state_manager.load_state()
+            self.state_manager.begin_run()
 
             # Process each monitor configuration
-            monitors = self.config.get("monitors", [])
-            enabled_monitors = [m for m in monitors if m.get("enabled", True)]
+            enabled_monitors = [monitor for monitor in self.monitors if monitor.enabled]
+
+            logger.info("Processing %d enabled monitor(s)...", len(enabled_monitors))
 
-            print(f"\nProcessing {len(enabled_monitors)} enabled monitor(s)...")
+            # Monitors are I/O bound (login, scrape, webhook), so run them
+            # concurrently; wall time is then roughly that of the slowest one.
+            # Never start more workers than there are monitors.
+            results = []
+            if enabled_monitors:
+                workers = min(self.MONITOR_WORKERS, len(enabled_monitors))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="monitor") as executor:
+                    results = list(executor.map(self._process_monitor, enabled_monitors))
 
-            total_notifications = 0
+            pending_notifications = [future for future in results if future is not None]
 
-            for monitor_config in enabled_monitors:
-                notifications_sent = self._process_monitor(monitor_config)
-                total_notifications += notifications_sent
+            # Wait for queued Discord notifications to be delivered
+            total_notifications = sum(future.result() for future in pending_notifications)
 
             # Save updated state
             self.state_manager.save_state()
 
-            print("\n" + "=" * 60)
-            print(f"Monitor completed successfully")
-            print(f"Total notifications sent: {total_notifications}")
-            print("=" * 60)
+            logger.info("=" * 60)
+            logger.info("Monitor completed successfully")
+            logger.info("Total notifications sent: %d", total_notifications)
+            logger.info("=" * 60)
 
             return 0
 
         except Exception as e:
-            print(f"\nFATAL ERROR: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("FATAL ERROR: %s", e)
             return 1
 
-    def _process_monitor(self, monitor_config: Dict) -> int:
+    def _process_monitor(self, monitor: MonitorSpec) -> Optional[Future]:
         """Process a single monitor configuration.
 
         Args:
-            monitor_config: Monitor configuration dictionary
+            monitor: Monitor to process
 
         Returns:
-            Number of notifications sent
+            Future resolving to the number of notifications sent, or None if
+            no notifications were queued
         """
-        monitor_id = monitor_config.get("id")
-        monitor_name = monitor_config.get("name", "Monitor")
-        monitor_type = monitor_config.get("type", "thread")  # "thread" or "forum"
-        forum_url = monitor_config.get("forum_url")
-        webhook_env = monitor_config.get("discord_webhook_env", "DISCORD_WEBHOOK_URL")
-
-        print(f"\n--- Processing: {monitor_name} (ID: {monitor_id}, Type: {monitor_type}) ---")
-
-        # Validate common configuration
-        if not all([monitor_id, forum_url, webhook_env]):
-            print(f"ERROR: Incomplete configuration for monitor {monitor_id}")
-            return 0
+        logger.info("--- Processing: %s (ID: %s, Type: %s) ---", monitor.name, monitor.id, monitor.type)
 
         # Route to appropriate handler
-        if monitor_type == "forum":
-            return self._process_forum_monitor(monitor_config)
+        if monitor.type == "forum":
+            return self._process_forum_monitor(monitor)
         else:
-            return self._process_thread_monitor(monitor_config)
+            return self._process_thread_monitor(monitor)
 
-    def _process_forum_monitor(self, monitor_config: Dict) -> int:
+    @contextmanager
+    def _monitor_context(self, monitor: MonitorSpec) -> Iterator[Optional[Tuple[ForoactivoClient, DiscordNotifier]]]:
+        """Provide the client and notifier for a monitor and report its errors.
+
+        Exceptions raised inside the block are logged and sent to the
+        monitor's webhook instead of propagating.
+
+        Args:
+            monitor: Monitor being processed
+
+        Yields:
+            (client, notifier) tuple, or None if the monitor cannot run
+        """
+        notifier = None
+        yielded = False
+        try:
+            # Get the shared notifier and authenticated client
+            notifier = self._get_notifier(monitor.webhook_url)
+            client = self._get_client(monitor.forum_url)
+            if client is None:
+                error_msg = f"Failed to authenticate to forum: {monitor.forum_url}"
+                logger.error(error_msg)
+                notifier.send_error_notification(error_msg, monitor.name)
+                yielded = True
+                yield None
+                return
+
+            yielded = True
+            yield client, notifier
+
+        except Exception as e:
+            error_msg = f"Error processing {monitor.type} monitor {monitor.id}: {str(e)}"
+            logger.error(error_msg)
+
+            # Try to send error notification
+            try:
+                if notifier is not None:
+                    notifier.send_error_notification(error_msg, monitor.name)
+            except Exception:
+                pass  # Ignore errors when sending error notification
+
+            # Setup failed before the block ran, so hand it nothing to do
+            if not yielded:
+                yield None
+
+    def _process_forum_monitor(self, monitor: MonitorSpec) -> Optional[Future]:
         """Process a forum section monitor (new threads).
 
         Args:
-            monitor_config: Monitor configuration dictionary
+            monitor: Forum monitor to process
 
         Returns:
-            Number of notifications sent
+            Future resolving to the number of notifications sent, or None if
+            no notifications were queued
         """
-        forum_id = monitor_config.get("id")
-        forum_name = monitor_config.get("name", "Forum")
-        base_forum_url = monitor_config.get("forum_url")
-        section_url = monitor_config.get("section_url")
-        webhook_env = monitor_config.get("discord_webhook_env", "DISCORD_WEBHOOK_URL")
-
-        # Validate configuration
-        if not section_url:
-            print(f"ERROR: section_url required for forum monitor {forum_id}")
-            return 0
+        forum_id = monitor.id
+        forum_name = monitor.name
+        section_url = monitor.section_url
+
+        with self._monitor_context(monitor) as context:
+            if context is None:
+                return None
+            client, notifier = context
+
+            # Fetch forum threads, revalidating against the copy seen last run
+            logger.info("Fetching threads from: %s", section_url)
+            all_threads, validators = client.get_forum_threads(
+                section_url, self.state_manager.get_page_validators(forum_id)
+            )
 
-        # Get Discord webhook URL from environment
-        webhook_url = os.getenv(webhook_env)
-        if not webhook_url:
-            print(f"ERROR: Environment variable {webhook_env} not set")
-            return 0
-
-        try:
-            # Initialize client and notifier
-            client = ForoactivoClient(base_forum_url, self.username, self.password)
-            notifier = DiscordNotifier(webhook_url)
-
-            # Authenticate
-            print(f"Authenticating to {base_forum_url}...")
-            if not client.login():
-                error_msg = f"Failed to authenticate to forum: {base_forum_url}"
-                print(f"ERROR: {error_msg}")
-                notifier.send_error_notification(error_msg, forum_name)
-                return 0
-
-            # Fetch forum threads
-            print(f"Fetching threads from: {section_url}")
-            all_threads = client.get_forum_threads(section_url)
+            if all_threads is None:
+                logger.info("No new threads to notify about")
+                return None
 
             if not all_threads:
-                print("WARNING: No threads found in forum section")
-                return 0
+                logger.warning("No threads found in forum section")
+                return None
 
             # Determine new threads
             new_threads = self.state_manager.get_new_threads(forum_id, all_threads)
 
-            # Update state with all current thread IDs
-            all_thread_ids = [thread["id"] for thread in all_threads]
-            self.state_manager.update_forum_state(forum_id, all_thread_ids)
+            # Record the current thread IDs together with the validators that
+            # let the next run skip this listing if it has not changed
+            all_thread_ids = [thread.id for thread in all_threads]
+            self.state_manager.update_forum_state(forum_id, all_thread_ids, validators)
 
             if not new_threads:
-                print("No new threads to notify about")
-                return 0
-
-            # Send notifications
-            print(f"Sending {len(new_threads)} notification(s) to Discord...")
-            notifications_sent = notifier.send_batch_thread_notifications(new_threads, forum_name)
+                logger.info("No new threads to notify about")
+                return None
 
-            return notifications_sent
+            # Queue notifications; they are delivered while other monitors run
+            logger.info("Sending %d notification(s) to Discord...", len(new_threads))
+            return notifier.send_batch_thread_notifications_async(new_threads, forum_name)
 
-        except Exception as e:
-            error_msg = f"Error processing forum monitor {forum_id}: {str(e)}"
-            print(f"ERROR: {error_msg}")
-
-            # Try to send error notification
-            try:
-                webhook_url = os.getenv(webhook_env)
-                if webhook_url:
-                    notifier = DiscordNotifier(webhook_url)
-                    notifier.send_error_notification(error_msg, forum_name)
-            except:
-                pass
-
-            return 0
+        # Only reached when the monitor failed and the error was reported
+        return None
 
-    def _process_thread_monitor(self, monitor_config: Dict) -> int:
+    def _process_thread_monitor(self, monitor: MonitorSpec) -> Optional[Future]:
         """Process a thread monitor (new replies).
 
         Args:
-            monitor_config: Monitor configuration dictionary
+            monitor: Thread monitor to process
 
         Returns:
-            Number of notifications sent
+            Future resolving to the number of notifications sent, or None if
+            no notifications were queued
         """
-        thread_id = monitor_config.get("id")
-        thread_name = monitor_config.get("name", "Thread")
-        forum_url = monitor_config.get("forum_url")
-        thread_url = monitor_config.get("thread_url")
-        webhook_env = monitor_config.get("discord_webhook_env", "DISCORD_WEBHOOK_URL")
-
-        # Validate configuration
-        if not thread_url:
-            print(f"ERROR: thread_url required for thread monitor {thread_id}")
-            return 0
-
-        # Get Discord webhook URL from environment
-        webhook_url = os.getenv(webhook_env)
-        if not webhook_url:
-            print(f"ERROR: Environment variable {webhook_env} not set")
-            return 0
-
-        try:
-            # Initialize client and notifier
-            client = ForoactivoClient(forum_url, self.username, self.password)
-            notifier = DiscordNotifier(webhook_url)
-
-            # Authenticate
-            print(f"Authenticating to {forum_url}...")
-            if not client.login():
-                error_msg = f"Failed to authenticate to forum: {forum_url}"
-                print(f"ERROR: {error_msg}")
-                notifier.send_error_notification(error_msg, thread_name)
-                return 0
-
-            # Fetch thread posts
-            print(f"Fetching posts from: {thread_url}")
-            all_posts = client.get_thread_posts(thread_url)
+        thread_id = monitor.id
+        thread_name = monitor.name
+        thread_url = monitor.thread_url
+
+        with self._monitor_context(monitor) as context:
+            if context is None:
+                return None
+            client, notifier = context
+
+            # Fetch thread posts, stopping at the pages already seen; a thread
+            # tracked for the first time only needs its latest post
+            logger.info("Fetching posts from: %s", thread_url)
+            last_post_id = self.state_manager.get_last_post_id(thread_id)
+            all_posts = client.get_thread_posts(
+                thread_url, stop_at_id=last_post_id, newest_page_only=last_post_id is None
+            )
+            total_posts = client.get_post_count(thread_url) or len(all_posts)
 
             if not all_posts:
-                print("WARNING: No posts found in thread")
-                return 0
+                logger.warning("No posts found in thread")
+                return None
 
             # Determine new posts
             new_posts = self.state_manager.get_new_posts(thread_id, all_posts)
 
             if not new_posts:
-                print("No new posts to notify about")
+                logger.info("No new posts to notify about")
                 # Still update state with latest post
                 latest_post = all_posts[-1]
                 self.state_manager.update_thread_state(
                     thread_id,
-                    latest_post["id"],
-                    len(all_posts)
+                    latest_post.id,
+                    total_posts
                 )
-                return 0
-
-            # Send notifications
-            print(f"Sending {len(new_posts)} notification(s) to Discord...")
-            notifications_sent = notifier.send_batch_notifications(new_posts, thread_name)
-
-            # Update state with latest post
-            latest_post = all_posts[-1]
-            self.state_manager.update_thread_state(
-                thread_id,
-                latest_post["id"],
-                len(all_posts)
-            )
+                return None
 
-            return notifications_sent
+            # Queue notifications; they are delivered while other monitors run.
+            # State advances one post at a time as each is delivered, so an
+            # interrupted or failed batch resumes exactly where it stopped.
+            def record_sent(post):
+                self.state_manager.update_thread_state(thread_id, post.id, total_posts)
 
-        except Exception as e:
-            error_msg = f"Error processing monitor {thread_id}: {str(e)}"
-            print(f"ERROR: {error_msg}")
+            logger.info("Sending %d notification(s) to Discord...", len(new_posts))
+            return notifier.send_batch_notifications_async(new_posts, thread_name, on_sent=record_sent)
 
-            # Try to send error notification
-            try:
-                webhook_url = os.getenv(webhook_env)
-                if webhook_url:
-                    notifier = DiscordNotifier(webhook_url)
-                    notifier.send_error_notification(error_msg, thread_name)
-            except:
-                pass  # Ignore errors when sending error notification
+        # Only reached when the monitor failed and the error was reported
+        return None
 
-            return 0
+
+def _configure_logging() -> None:
+    """Send log records to stdout through a buffer.
+
+    Records are written in batches of up to 100, or immediately for
+    warnings and errors, instead of one write per line. Any remaining
+    records are flushed at exit. The LOG_LEVEL environment variable
+    (default INFO) sets the threshold; with WARNING, routine progress
+    messages are not even formatted.
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    buffer_handler = logging.handlers.MemoryHandler(
+        capacity=100,
+        flushLevel=logging.WARNING,
+        target=stream_handler
+    )
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), handlers=[buffer_handler])
 
 
 def main():
     """Main entry point for the monitor."""
+    # Load .env first so LOG_LEVEL can be set there
+    _ensure_env()
+    _configure_logging()
     try:
         monitor = ForoactivoMonitor()
         exit_code = monitor.run()
         sys.exit(exit_code)
     except Exception as e:
-        print(f"\nFATAL ERROR during initialization: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("FATAL ERROR during initialization: %s", e)
         sys.exit(1)
 
 
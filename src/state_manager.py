@@ -1,15 +1,47 @@
 """State Manager - Track seen posts to avoid duplicate notifications."""
 
-import json
+import logging
 import os
-from datetime import datetime
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from .models import PageValidators, PostRef, ThreadRef, id_number
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_set(value):
+    """Serialize sets as sorted JSON arrays so the state file diffs cleanly."""
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _utc_timestamp() -> str:
+    """Get the current UTC time as an ISO 8601 string (e.g. 2025-12-29T12:00:00Z)."""
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _is_below_floor(thread_id: str, floor: int) -> bool:
+    """Check whether a thread ID falls at or below a forum's seen floor."""
+    number = id_number(thread_id)
+    return number is not None and number <= floor
 
 
 class StateManager:
     """Manage state persistence for tracking seen posts."""
 
+    # Seen thread IDs kept per forum; older ones are folded into a floor
+    MAX_SEEN_THREAD_IDS = 1000
+
+    # Size at which the update log is folded back into the state file
+    WAL_COMPACT_BYTES = 1024 * 1024
+
     def __init__(self, state_file: str = "state.json"):
         """Initialize the state manager.
 
@@ -21,50 +53,146 @@ class StateManager:
         self.state_file = project_root / state_file
         self.state: Dict[str, Dict] = {}
 
+        # Append-only log of updates since the state file was last written
+        self.wal_file = self.state_file.with_suffix(".wal")
+        self._wal = None
+        self._compact_pending = False
+
+        # Monitors run concurrently and update state from worker threads
+        self._lock = threading.Lock()
+
+        # Set when tracked data changes; check timestamps alone don't count
+        self._dirty = False
+
+        # Check timestamp shared by every update in a run (see begin_run)
+        self._run_timestamp = _utc_timestamp()
+
+    def begin_run(self) -> None:
+        """Start a monitoring run, fixing the check timestamp for its updates."""
+        self._run_timestamp = _utc_timestamp()
+
     def load_state(self) -> Dict[str, Dict]:
         """Load state from file.
 
+        The state file is a snapshot; updates logged since it was written
+        are replayed on top of it.
+
         Returns:
             Dictionary mapping thread IDs to their state
         """
+        self.state = {}
         if not self.state_file.exists():
-            print(f"State file not found, creating new state: {self.state_file}")
-            self.state = {}
-            return self.state
+            logger.info("State file not found, creating new state: %s", self.state_file)
+        else:
+            try:
+                self.state = orjson.loads(self.state_file.read_bytes())
+            except orjson.JSONDecodeError as e:
+                logger.error("Error reading state file: %s", e)
+                logger.warning("Starting with empty state")
+            except Exception as e:
+                logger.error("Unexpected error loading state: %s", e)
+
+        self._replay_wal()
+
+        # Seen thread IDs are stored as JSON arrays but kept as sets in memory
+        for entry in self.state.values():
+            if isinstance(entry, dict) and "seen_thread_ids" in entry:
+                entry["seen_thread_ids"] = set(entry["seen_thread_ids"])
+
+        logger.info("Loaded state for %d threads", len(self.state))
+        return self.state
+
+    def _replay_wal(self) -> None:
+        """Apply the updates logged in the WAL file to the loaded state."""
+        if not self.wal_file.exists():
+            return
+
+        replayed = 0
+        for line in self.wal_file.read_bytes().splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+                key, entry = record["k"], record["v"]
+            except (orjson.JSONDecodeError, TypeError, KeyError):
+                # Interrupted mid-write or damaged; rewrite the log on next save
+                logger.warning("Skipping malformed record in %s", self.wal_file)
+                self._compact_pending = True
+                continue
+            self.state[key] = entry
+            replayed += 1
+
+        if replayed:
+            logger.info("Replayed %d state update(s) from %s", replayed, self.wal_file)
+
+    def _append_wal(self, key: str, entry: Dict) -> None:
+        """Log an updated state entry. Must be called with the lock held.
 
-        try:
-            with open(self.state_file, "r", encoding="utf-8") as f:
-                self.state = json.load(f)
-            print(f"Loaded state for {len(self.state)} threads")
-            return self.state
-        except json.JSONDecodeError as e:
-            print(f"Error reading state file: {e}")
-            print("Starting with empty state")
-            self.state = {}
-            return self.state
-        except Exception as e:
-            print(f"Unexpected error loading state: {e}")
-            self.state = {}
-            return self.state
+        Args:
+            key: Thread or forum ID the entry belongs to
+            entry: New state entry
+        """
+        if self._wal is None:
+            self._wal = open(self.wal_file, "ab")
+        self._wal.write(orjson.dumps({"k": key, "v": entry}, default=_encode_set) + b"\n")
+        self._wal.flush()
 
     def save_state(self) -> bool:
-        """Save current state to file.
+        """Persist the changes made since the last save.
+
+        Updates are already appended to the WAL file as they happen, so
+        saving normally just syncs it to disk. Once the log grows past
+        WAL_COMPACT_BYTES, or if there is no state file yet, it is compacted: the full state is written to a
+        temporary file which then replaces the state file, and the log is
+        emptied. An interrupted save leaves the previous state intact.
+        Nothing is written if no post or thread changed since the last save.
 
         Returns:
-            True if save successful, False otherwise
+            True if save successful (or nothing to save), False otherwise
         """
-        try:
-            # Ensure parent directory exists
-            self.state_file.parent.mkdir(parents=True, exist_ok=True)
-
-            # Write state to file with pretty formatting
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self.state, f, indent=2, ensure_ascii=False)
+        if not self._dirty and not self._compact_pending:
+            logger.info("State unchanged, skipping save")
+            return True
 
-            print(f"State saved successfully: {self.state_file}")
+        tmp_file = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+        try:
+            with self._lock:
+                if self._wal is not None:
+                    os.fsync(self._wal.fileno())
+                    self._wal.close()
+                    self._wal = None
+
+                wal_size = self.wal_file.stat().st_size if self.wal_file.exists() else 0
+                # Without a snapshot there is nothing to replay the log onto
+                if (wal_size < self.WAL_COMPACT_BYTES and not self._compact_pending
+                        and self.state_file.exists()):
+                    self._dirty = False
+                    logger.info("State changes logged to %s", self.wal_file)
+                    return True
+
+                # Ensure parent directory exists
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+                # Write state to file with pretty formatting (kept readable since
+                # the file is committed); orjson emits UTF-8 directly
+                data = orjson.dumps(self.state, default=_encode_set, option=orjson.OPT_INDENT_2)
+                with open(tmp_file, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.state_file)
+
+                # Everything logged is now in the snapshot (replaying it again
+                # would be harmless if this truncation does not happen)
+                open(self.wal_file, "wb").close()
+                self._dirty = False
+                self._compact_pending = False
+
+            logger.info("State saved successfully: %s", self.state_file)
             return True
         except Exception as e:
-            print(f"Error saving state: {e}")
+            logger.error("Error saving state: %s", e)
+            tmp_file.unlink(missing_ok=True)
             return False
 
     def get_last_post_id(self, thread_id: str) -> Optional[str]:
@@ -76,8 +204,9 @@ class StateManager:
         Returns:
             Last seen post ID or None if thread not tracked
         """
-        thread_state = self.state.get(thread_id, {})
-        return thread_state.get("last_post_id")
+        with self._lock:
+            thread_state = self.state.get(thread_id, {})
+            return thread_state.get("last_post_id")
 
     def update_thread_state(self, thread_id: str, last_post_id: str, total_posts: int) -> None:
         """Update state for a thread.
@@ -87,14 +216,21 @@ class StateManager:
             last_post_id: ID of the most recent post
             total_posts: Total number of posts seen in the thread
         """
-        self.state[thread_id] = {
-            "last_post_id": last_post_id,
-            "last_checked_at": datetime.utcnow().isoformat() + "Z",
-            "total_posts_seen": total_posts
-        }
-        print(f"Updated state for thread {thread_id}: last_post={last_post_id}, total={total_posts}")
+        with self._lock:
+            thread_state = self.state.get(thread_id, {})
+            changed = (thread_state.get("last_post_id") != last_post_id
+                       or thread_state.get("total_posts_seen") != total_posts)
+            self.state[thread_id] = {
+                "last_post_id": last_post_id,
+                "last_checked_at": self._run_timestamp,
+                "total_posts_seen": total_posts
+            }
+            if changed:
+                self._dirty = True
+                self._append_wal(thread_id, self.state[thread_id])
+        logger.info("Updated state for thread %s: last_post=%s, total=%d", thread_id, last_post_id, total_posts)
 
-    def get_new_threads(self, forum_id: str, all_threads: List[Dict]) -> List[Dict]:
+    def get_new_threads(self, forum_id: str, all_threads: List[ThreadRef]) -> List[ThreadRef]:
         """Filter threads to get only new ones not yet seen.
 
         Args:
@@ -107,38 +243,114 @@ class StateManager:
         if not all_threads:
             return []
 
-        # Get list of seen thread IDs
-        forum_state = self.state.get(forum_id, {})
-        seen_thread_ids = set(forum_state.get("seen_thread_ids", []))
+        with self._lock:
+            # Get list of seen thread IDs
+            forum_state = self.state.get(forum_id, {})
+            seen_thread_ids = forum_state.get("seen_thread_ids", set())
+            seen_floor = forum_state.get("seen_thread_floor", 0)
 
-        # Find new threads
-        new_threads = [
-            thread for thread in all_threads
-            if thread["id"] not in seen_thread_ids
-        ]
+            # Find new threads (anything at or below the floor was seen and pruned)
+            new_threads = []
+            for thread in all_threads:
+                if thread.id not in seen_thread_ids and not _is_below_floor(thread.id, seen_floor):
+                    new_threads.append(thread)
 
         if new_threads:
-            print(f"Found {len(new_threads)} new thread(s) in forum {forum_id}")
+            logger.info("Found %d new thread(s) in forum %s", len(new_threads), forum_id)
         else:
-            print(f"No new threads in forum {forum_id}")
+            logger.info("No new threads in forum %s", forum_id)
 
         return new_threads
 
-    def update_forum_state(self, forum_id: str, thread_ids: List[str]) -> None:
+    def update_forum_state(self, forum_id: str, thread_ids: Iterable[str],
+                           validators: Optional[PageValidators] = None) -> None:
         """Update state for a forum section.
 
+        Thread IDs are added to the ones already seen, so a thread that drops
+        off the listing and comes back is not announced again. Only the
+        newest MAX_SEEN_THREAD_IDS are kept; older ones are replaced by a
+        floor, since Foroactivo numbers threads in creation order.
+
+        The page's validators are stored with the entry but never cause a
+        write by themselves: listings with changing fragments (relative
+        dates, users online) or a fresh Last-Modified on every response
+        would otherwise be saved on every run. A stale validator only costs
+        an unconditional fetch.
+
         Args:
             forum_id: Unique identifier for the forum section
-            thread_ids: List of all thread IDs currently in the forum
+            thread_ids: All thread IDs currently in the forum
+            validators: Validators of the fetched listing page, if known
         """
-        self.state[forum_id] = {
-            "seen_thread_ids": thread_ids,
-            "last_checked_at": datetime.utcnow().isoformat() + "Z",
-            "total_threads": len(thread_ids)
-        }
-        print(f"Updated state for forum {forum_id}: {len(thread_ids)} threads tracked")
+        thread_ids = set(thread_ids)
+        with self._lock:
+            forum_state = self.state.get(forum_id, {})
+            seen_thread_ids = forum_state.get("seen_thread_ids", set())
+            seen_floor = forum_state.get("seen_thread_floor", 0)
+
+            # IDs at or below the floor are already accounted for
+            added_ids = {
+                thread_id for thread_id in thread_ids - seen_thread_ids
+                if not _is_below_floor(thread_id, seen_floor)
+            }
+            changed = bool(added_ids) or forum_state.get("total_threads") != len(thread_ids)
+            seen_thread_ids.update(added_ids)
+
+            # Fold the oldest IDs into the floor to keep the state bounded
+            excess = len(seen_thread_ids) - self.MAX_SEEN_THREAD_IDS
+            if excess > 0:
+                numbered = sorted(
+                    (number, thread_id) for thread_id in seen_thread_ids
+                    if (number := id_number(thread_id)) is not None
+                )
+                for number, thread_id in numbered[:excess]:
+                    seen_thread_ids.discard(thread_id)
+                    seen_floor = max(seen_floor, number)
+
+            # Only keep the validators the server actually sent
+            if validators is not None:
+                forum_state = {
+                    name: value for name, value in forum_state.items()
+                    if name not in ("etag", "last_modified", "last_html_hash")
+                }
+                if validators.etag:
+                    forum_state["etag"] = validators.etag
+                if validators.last_modified:
+                    forum_state["last_modified"] = validators.last_modified
+                if validators.content_hash:
+                    forum_state["last_html_hash"] = validators.content_hash
+
+            self.state[forum_id] = {
+                **forum_state,
+                "seen_thread_ids": seen_thread_ids,
+                "seen_thread_floor": seen_floor,
+                "last_checked_at": self._run_timestamp,
+                "total_threads": len(thread_ids)
+            }
+            if changed:
+                self._dirty = True
+                self._append_wal(forum_id, self.state[forum_id])
+        logger.info("Updated state for forum %s: %d threads tracked", forum_id, len(seen_thread_ids))
+
+    def get_page_validators(self, key: str) -> PageValidators:
+        """Get the validators saved for a monitored forum section.
+
+        Args:
+            key: Unique identifier of the forum section
 
-    def get_new_posts(self, thread_id: str, all_posts: List[Dict]) -> List[Dict]:
+        Returns:
+            ETag, Last-Modified and content hash of the last recorded fetch;
+            any may be None
+        """
+        with self._lock:
+            entry = self.state.get(key, {})
+            return PageValidators(
+                etag=entry.get("etag"),
+                last_modified=entry.get("last_modified"),
+                content_hash=entry.get("last_html_hash"),
+            )
+
+    def get_new_posts(self, thread_id: str, all_posts: List[PostRef]) -> List[PostRef]:
         """Filter posts to get only new ones not yet seen.
 
         Args:
@@ -156,33 +368,58 @@ class StateManager:
         # If no state exists, treat all posts as old (avoid spam on first run)
         # Only notify about the very last post to establish state
         if last_post_id is None:
-            print(f"First time tracking thread {thread_id}, establishing initial state")
+            logger.info("First time tracking thread %s, establishing initial state", thread_id)
             # Return only the last post to avoid spamming
             return [all_posts[-1]] if all_posts else []
 
-        # Find the index of the last seen post
-        last_post_index = -1
-        for i, post in enumerate(all_posts):
-            if post["id"] == last_post_id:
-                last_post_index = i
-                break
-
-        # If last post not found, something changed - notify about last post only
-        if last_post_index == -1:
-            print(f"Warning: Last post ID {last_post_id} not found in current posts")
-            print(f"Thread structure may have changed. Returning only the latest post.")
-            return [all_posts[-1]] if all_posts else []
+        # Find the index of the last seen post with a single hash lookup
+        index_by_id = {post.id: i for i, post in enumerate(all_posts)}
+        last_post_index = index_by_id.get(last_post_id, -1)
+
+        if last_post_index != -1:
+            start = last_post_index + 1
+        else:
+            # The last seen post is gone (e.g. deleted); resume after where it
+            # would have been, since post numbers grow with post order
+            logger.warning("Last post ID %s not found in current posts", last_post_id)
+            start = self._position_after(all_posts, last_post_id)
+
+            # If even that fails, something changed - notify about last post only
+            if start == -1:
+                logger.warning("Thread structure may have changed. Returning only the latest post.")
+                return [all_posts[-1]] if all_posts else []
 
         # Return all posts after the last seen post
-        new_posts = all_posts[last_post_index + 1:]
+        new_posts = all_posts[start:]
 
         if new_posts:
-            print(f"Found {len(new_posts)} new post(s) in thread {thread_id}")
+            logger.info("Found %d new post(s) in thread %s", len(new_posts), thread_id)
         else:
-            print(f"No new posts in thread {thread_id}")
+            logger.info("No new posts in thread %s", thread_id)
 
         return new_posts
 
+    @staticmethod
+    def _position_after(all_posts: List[PostRef], post_id: str) -> int:
+        """Find where posts newer than a missing post start.
+
+        Args:
+            all_posts: Posts in thread order
+            post_id: ID of a post that is no longer in the thread
+
+        Returns:
+            Index of the first post numbered above post_id, or -1 if the
+            posts cannot be ordered by number
+        """
+        last_number = id_number(post_id)
+        numbers = [post.number for post in all_posts]
+        if last_number is None or None in numbers:
+            return -1
+        # Equal neighbours are fine: some templates match a post twice
+        if any(a > b for a, b in zip(numbers, numbers[1:])):
+            return -1
+        return bisect_right(numbers, last_number)
+
     def get_state_summary(self) -> Dict[str, any]:
         """Get a summary of the current state.
 
@@ -0,0 +1,51 @@
+"""Tests for the Discord notifier."""
+
+import pytest
+import requests
+
+from src.discord_notifier import DiscordNotifier
+from src.models import PostRef
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b""
+    return response
+
+
+def _posts(count):
+    return [
+        PostRef(id=f"p{n}", author="Author", content="Text", timestamp="",
+                url=f"https://example.foroactivo.com/t1-thread#p{n}", number=n)
+        for n in range(1, count + 1)
+    ]
+
+
+@pytest.fixture
+def notifier():
+    return DiscordNotifier("https://discord.com/api/webhooks/1/token")
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404])
+def test_batch_skips_posts_rejected_by_discord(notifier, mocker, status_code):
+    mocker.patch.object(notifier, "_post_with_retries",
+                        side_effect=[_response(204), _response(status_code), _response(204)])
+    handled = []
+
+    sent = notifier.send_batch_notifications(_posts(3), on_sent=handled.append)
+
+    assert sent == 2
+    assert [post.id for post in handled] == ["p1", "p2", "p3"]
+
+
+@pytest.mark.parametrize("failure", [_response(429), _response(503), requests.ConnectionError("reset")])
+def test_batch_stops_at_retryable_failure(notifier, mocker, failure):
+    mocker.patch.object(notifier, "_post_with_retries",
+                        side_effect=[_response(204), failure, _response(204)])
+    handled = []
+
+    sent = notifier.send_batch_notifications(_posts(3), on_sent=handled.append)
+
+    assert sent == 1
+    assert [post.id for post in handled] == ["p1"]
@@ -0,0 +1,231 @@
+"""Tests for the Foroactivo client."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from src.foroactivo_client import ForoactivoClient
+from src.models import PageValidators
+
+
+class _TruncatedHandler(BaseHTTPRequestHandler):
+    """Promise a longer body than is sent, then drop the connection."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", "1000")
+        self.end_headers()
+        self.wfile.write(b"<html><body>")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SectionHandler(BaseHTTPRequestHandler):
+    """Serve a forum section with an ETag, honouring If-None-Match."""
+
+    BODY = (b'<div class="unr-wtp"><div class="unr-listopic-topic">'
+            b'<a href="/t5-thread">Thread</a></div></div>')
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(self.BODY)))
+        self.end_headers()
+        self.wfile.write(self.BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(handler):
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def section_server():
+    """Local HTTP server for a forum section that supports conditional GETs."""
+    server = _serve(_SectionHandler)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def truncating_server():
+    """Local HTTP server whose responses are cut short."""
+    server = _serve(_TruncatedHandler)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(truncating_server, tmp_path):
+    """Client for the truncating server that keeps no cookies on disk."""
+    return ForoactivoClient(truncating_server, "user", "password",
+                            cookie_file=tmp_path / "cookies")
+
+
+def test_truncated_body_raises_requests_error(client, truncating_server):
+    with pytest.raises(requests.RequestException):
+        client._get_page(f"{truncating_server}/t1-thread")
+
+
+def test_truncated_thread_page_is_handled(client, truncating_server):
+    assert client.get_thread_posts(f"{truncating_server}/t1-thread") == []
+
+
+def test_truncated_login_page_fails_login(client):
+    assert client.login() is False
+
+
+def test_parse_posts_with_ids_on_table_rows(tmp_path):
+    client = ForoactivoClient("https://example.foroactivo.com", "user", "password",
+                              cookie_file=tmp_path / "cookies")
+    html = (
+        b'<table>'
+        b'<tr id="p10" class="post"><td><div class="postbody">First</div></td></tr>'
+        b'<tr id="p11" class="post"><td><div class="postbody">Second</div></td></tr>'
+        b'</table>'
+    )
+
+    posts = client._parse_posts(html, "https://example.foroactivo.com/t1-thread")
+
+    assert [post.id for post in posts] == ["p10", "p11"]
+
+
+def test_forum_validators_are_per_caller(section_server, tmp_path):
+    client = ForoactivoClient(section_server, "user", "password",
+                              cookie_file=tmp_path / "cookies")
+    section_url = f"{section_server}/f1-section"
+
+    threads, validators = client.get_forum_threads(section_url)
+    assert [thread.id for thread in threads] == ["t5"]
+    assert validators.etag == '"v1"'
+    assert validators.content_hash
+
+    # A caller with the current validators gets a 304...
+    assert client.get_forum_threads(section_url, validators) == (None, validators)
+    # ...while another caller on the same client still gets the listing
+    threads, _ = client.get_forum_threads(section_url, PageValidators())
+    assert [thread.id for thread in threads] == ["t5"]
+
+
+def test_forum_section_with_same_hash_is_not_parsed(section_server, tmp_path, mocker):
+    client = ForoactivoClient(section_server, "user", "password",
+                              cookie_file=tmp_path / "cookies")
+    section_url = f"{section_server}/f1-section"
+    _, validators = client.get_forum_threads(section_url)
+    parse = mocker.spy(client, "_parse_thread_from_custom_theme")
+
+    threads, _ = client.get_forum_threads(section_url, PageValidators(content_hash=validators.content_hash))
+
+    assert threads is None
+    parse.assert_not_called()
+
+
+PAGE_SIZE = 3
+THREAD_URL = "https://example.foroactivo.com/t1-thread"
+
+
+def _thread_pages(numbers):
+    """HTML of each page of a thread holding the given post numbers, by URL."""
+    offsets = range(0, len(numbers), PAGE_SIZE)
+    links = b"".join(b'<a href="/t1p%d-thread">%d</a>' % (offset, offset) for offset in offsets[1:])
+    pages = {}
+    for offset in offsets:
+        url = THREAD_URL if offset == 0 else f"https://example.foroactivo.com/t1p{offset}-thread"
+        posts = b"".join(
+            b'<div class="post" id="p%d">Post %d</div>' % (number, number)
+            for number in numbers[offset:offset + PAGE_SIZE]
+        )
+        pages[url] = b"<html>" + posts + (links if offset == 0 else b"") + b"</html>"
+    return pages
+
+
+@pytest.fixture
+def paged_client(tmp_path, mocker):
+    """Client whose pages come from a dict; returns the client and fetched URLs."""
+    client = ForoactivoClient("https://example.foroactivo.com", "user", "password",
+                              cookie_file=tmp_path / "cookies")
+    client.PAGE_FETCH_WORKERS = 2
+    fetched = []
+
+    def serve(pages):
+        def get_page(url):
+            fetched.append(url)
+            return pages[url]
+        mocker.patch.object(client, "_get_page", side_effect=get_page)
+
+    return client, serve, fetched
+
+
+def _numbers(posts):
+    return [post.number for post in posts]
+
+
+def test_thread_posts_stop_in_a_later_batch(paged_client):
+    client, serve, fetched = paged_client
+    serve(_thread_pages(range(1, 31)))
+
+    posts = client.get_thread_posts(THREAD_URL, stop_at_id="p14")
+
+    # Pages are fetched two at a time from the end: 10+9, 8+7, 6+5
+    assert _numbers(posts) == list(range(13, 31))
+    assert len(fetched) == 1 + 6
+    assert client.get_post_count(THREAD_URL) == 30
+
+
+def test_thread_posts_stop_post_on_first_page(paged_client):
+    client, serve, fetched = paged_client
+    serve(_thread_pages(range(1, 13)))
+
+    posts = client.get_thread_posts(THREAD_URL, stop_at_id="p2")
+
+    assert _numbers(posts) == list(range(1, 13))
+    assert len(fetched) == 4
+    assert client.get_post_count(THREAD_URL) == 12
+
+
+def test_thread_posts_stop_at_older_post_when_stop_post_deleted(paged_client):
+    client, serve, fetched = paged_client
+    serve(_thread_pages([number for number in range(1, 31) if number != 22]))
+
+    posts = client.get_thread_posts(THREAD_URL, stop_at_id="p22")
+
+    # p22 is gone, so the walk stops at the page holding p21
+    assert _numbers(posts) == [19, 20, 21, 23, 24] + list(range(25, 31))
+    assert client.get_post_count(THREAD_URL) == 29
+
+
+def test_thread_posts_single_page(paged_client):
+    client, serve, fetched = paged_client
+    serve(_thread_pages(range(1, 3)))
+
+    posts = client.get_thread_posts(THREAD_URL, stop_at_id="p1")
+
+    assert _numbers(posts) == [1, 2]
+    assert fetched == [THREAD_URL]
+    assert client.get_post_count(THREAD_URL) == 2
+
+
+def test_thread_posts_newest_page_only(paged_client):
+    client, serve, fetched = paged_client
+    serve(_thread_pages(range(1, 30)))
+
+    posts = client.get_thread_posts(THREAD_URL, newest_page_only=True)
+
+    assert _numbers(posts) == [28, 29]
+    assert fetched == [THREAD_URL, "https://example.foroactivo.com/t1p27-thread"]
+    assert client.get_post_count(THREAD_URL) == 29
@@ -0,0 +1,16 @@
+"""Tests for the scraped record types."""
+
+from src.models import PostRef
+
+
+def test_post_as_dict_keeps_pre_1_1_payload():
+    post = PostRef(id="p12", author="Author", content="Text", timestamp="Hoy",
+                   url="https://example.foroactivo.com/t1-thread#p12", number=12)
+
+    assert post.as_dict() == {
+        "id": "p12",
+        "author": "Author",
+        "content": "Text",
+        "timestamp": "Hoy",
+        "url": "https://example.foroactivo.com/t1-thread#p12",
+    }
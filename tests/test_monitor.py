@@ -0,0 +1,83 @@
+"""Tests for the monitor orchestration."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+import pytest
+import requests
+
+from src.foroactivo_client import ForoactivoClient
+from src.monitor import ForoactivoMonitor
+from src.state_manager import StateManager
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """Monitor with one thread monitor and state kept in a temp directory."""
+    config_file = tmp_path / "threads.json"
+    config_file.write_bytes(orjson.dumps({
+        "monitors": [{
+            "id": "thread-1",
+            "name": "Thread",
+            "type": "thread",
+            "forum_url": "https://example.foroactivo.com",
+            "thread_url": "https://example.foroactivo.com/t1-thread",
+            "discord_webhook_env": "TEST_WEBHOOK_URL",
+        }]
+    }))
+    monkeypatch.setenv("FOROACTIVO_USERNAME", "user")
+    monkeypatch.setenv("FOROACTIVO_PASSWORD", "password")
+    monkeypatch.setenv("TEST_WEBHOOK_URL", "https://discord.com/api/webhooks/1/token")
+
+    monitor = ForoactivoMonitor(str(config_file))
+    monitor.state_manager = StateManager(str(tmp_path / "state.json"))
+    return monitor
+
+
+def test_setup_failure_is_reported_per_monitor(monitor, mocker):
+    notifier = mocker.Mock()
+    mocker.patch.object(monitor, "_get_notifier", return_value=notifier)
+    mocker.patch.object(monitor, "_get_client", side_effect=requests.ConnectionError("reset"))
+    save_state = mocker.spy(monitor.state_manager, "save_state")
+
+    assert monitor.run() == 0
+    save_state.assert_called_once()
+    notifier.send_error_notification.assert_called_once()
+
+
+def test_monitor_context_yields_none_when_setup_fails(monitor, mocker):
+    mocker.patch.object(monitor, "_get_notifier", side_effect=RuntimeError("boom"))
+
+    with monitor._monitor_context(monitor.monitors[0]) as context:
+        assert context is None
+
+
+def test_different_forums_log_in_concurrently(monitor, mocker):
+    # Both logins must be in progress at once for the barrier to open
+    barrier = threading.Barrier(2, timeout=5)
+    mocker.patch.object(ForoactivoClient, "ensure_logged_in", side_effect=lambda: barrier.wait() is not None)
+    forums = ["https://one.foroactivo.com", "https://two.foroactivo.com"]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        clients = list(executor.map(monitor._get_client, forums))
+
+    assert [client.forum_url for client in clients] == forums
+
+
+def test_same_forum_logs_in_once(monitor, mocker):
+    login = mocker.patch.object(ForoactivoClient, "ensure_logged_in", return_value=True)
+    forum_url = "https://one.foroactivo.com"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        clients = list(executor.map(monitor._get_client, [forum_url] * 4))
+
+    assert login.call_count == 1
+    assert all(client is clients[0] for client in clients)
+
+
+def test_missing_webhook_env_fails_fast(monitor, monkeypatch):
+    monkeypatch.delenv("TEST_WEBHOOK_URL")
+
+    with pytest.raises(ValueError, match="TEST_WEBHOOK_URL"):
+        ForoactivoMonitor(str(monitor.config_file))
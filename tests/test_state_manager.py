@@ -0,0 +1,168 @@
+"""Tests for the state manager."""
+
+import pytest
+
+from src.models import PageValidators, PostRef, ThreadRef
+from src.state_manager import StateManager
+
+
+def _post(number):
+    return PostRef(id=f"p{number}", author="Author", content="Text", timestamp="",
+                   url=f"https://example.foroactivo.com/t1-thread#p{number}", number=number)
+
+
+def _thread(thread_id):
+    return ThreadRef(id=thread_id, title="Thread", author="Author",
+                     url=f"https://example.foroactivo.com/{thread_id}-thread", last_post_date="")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return StateManager(str(tmp_path / "state.json"))
+
+
+def test_new_posts_resume_after_deleted_post_with_duplicates(manager):
+    manager.update_thread_state("thread-1", "p5", 3)
+    # Nested post markup yields every post twice
+    posts = [_post(n) for n in (3, 3, 7, 7, 9, 9)]
+
+    new_posts = manager.get_new_posts("thread-1", posts)
+
+    assert [post.id for post in new_posts] == ["p7", "p7", "p9", "p9"]
+
+
+def test_validators_are_saved_with_forum_changes_only(manager):
+    manager.load_state()
+    manager.update_forum_state("forum-1", ["t1", "t2"],
+                               PageValidators(last_modified="day 1", content_hash="hash-1"))
+    manager.save_state()
+    snapshot = manager.state_file.read_bytes()
+
+    # Same threads, different page (e.g. relative dates): nothing to save
+    manager.update_forum_state("forum-1", ["t1", "t2"],
+                               PageValidators(last_modified="day 2", content_hash="hash-2"))
+    assert manager.save_state()
+    assert manager.state_file.read_bytes() == snapshot
+    assert manager.wal_file.read_bytes() == b""
+
+    # A new thread saves the entry along with the latest validators
+    manager.update_forum_state("forum-1", ["t1", "t2", "t3"],
+                               PageValidators(etag='"v3"', content_hash="hash-3"))
+    assert manager.save_state()
+
+    reloaded = StateManager(str(manager.state_file))
+    reloaded.load_state()
+    assert reloaded.get_page_validators("forum-1") == PageValidators(etag='"v3"', content_hash="hash-3")
+
+
+def _write_wal(manager, *lines):
+    manager.wal_file.write_bytes(b"".join(line + b"\n" for line in lines))
+
+
+def test_wal_is_replayed_on_top_of_snapshot(manager):
+    manager.state_file.write_bytes(
+        b'{"thread-1": {"last_post_id": "p1"}, "thread-2": {"last_post_id": "p5"}}'
+    )
+    _write_wal(
+        manager,
+        b'{"k": "thread-1", "v": {"last_post_id": "p2"}}',
+        b'{"k": "thread-1", "v": {"last_post_id": "p3"}}',
+        b'{"k": "forum-1", "v": {"seen_thread_ids": ["t1"]}}',
+    )
+
+    manager.load_state()
+
+    assert manager.get_last_post_id("thread-1") == "p3"
+    assert manager.get_last_post_id("thread-2") == "p5"
+    assert manager.state["forum-1"]["seen_thread_ids"] == {"t1"}
+
+
+@pytest.mark.parametrize("bad_line", [b'{"k": "thread-2", "v": {"last', b'{"key": "thread-2"}', b"[1, 2]"])
+def test_malformed_wal_record_is_skipped_and_forces_compaction(manager, bad_line):
+    _write_wal(manager, b'{"k": "thread-1", "v": {"last_post_id": "p2"}}', bad_line)
+
+    manager.load_state()
+    assert manager.get_last_post_id("thread-1") == "p2"
+
+    # Nothing changed, yet the log is rewritten into the snapshot
+    assert manager.save_state()
+    assert manager.wal_file.read_bytes() == b""
+    reloaded = StateManager(str(manager.state_file))
+    reloaded.load_state()
+    assert reloaded.get_last_post_id("thread-1") == "p2"
+
+
+def test_small_wal_is_appended_without_rewriting_snapshot(manager):
+    manager.state_file.write_bytes(b"{}")
+    manager.load_state()
+    manager.update_thread_state("thread-1", "p2", 2)
+
+    assert manager.save_state()
+    assert manager.state_file.read_bytes() == b"{}"
+    assert b'"p2"' in manager.wal_file.read_bytes()
+
+
+def test_missing_snapshot_is_written_on_save(manager):
+    manager.load_state()
+    manager.update_thread_state("thread-1", "p2", 2)
+
+    assert manager.save_state()
+    assert manager.wal_file.read_bytes() == b""
+    reloaded = StateManager(str(manager.state_file))
+    assert reloaded.load_state()["thread-1"]["last_post_id"] == "p2"
+
+
+def test_wal_past_threshold_is_compacted(manager, monkeypatch):
+    monkeypatch.setattr(StateManager, "WAL_COMPACT_BYTES", 1)
+    manager.load_state()
+    manager.update_thread_state("thread-1", "p2", 2)
+
+    assert manager.save_state()
+    assert manager.wal_file.read_bytes() == b""
+
+    reloaded = StateManager(str(manager.state_file))
+    assert reloaded.load_state()["thread-1"]["last_post_id"] == "p2"
+
+
+def test_oldest_thread_ids_are_folded_into_floor(manager, monkeypatch):
+    monkeypatch.setattr(StateManager, "MAX_SEEN_THREAD_IDS", 3)
+
+    manager.update_forum_state("forum-1", ["t5", "t1", "t4", "t2", "t3"])
+
+    assert manager.state["forum-1"]["seen_thread_ids"] == {"t3", "t4", "t5"}
+    assert manager.state["forum-1"]["seen_thread_floor"] == 2
+
+
+def test_threads_at_or_below_floor_count_as_seen(manager, monkeypatch):
+    monkeypatch.setattr(StateManager, "MAX_SEEN_THREAD_IDS", 3)
+    manager.update_forum_state("forum-1", ["t1", "t2", "t3", "t4", "t5"])
+
+    new_threads = manager.get_new_threads("forum-1", [_thread(f"t{n}") for n in range(1, 7)])
+
+    assert [thread.id for thread in new_threads] == ["t6"]
+
+
+def test_non_numeric_thread_ids_are_never_folded(manager, monkeypatch):
+    monkeypatch.setattr(StateManager, "MAX_SEEN_THREAD_IDS", 2)
+
+    manager.update_forum_state("forum-1", ["t1", "t2", "t3", "tnews"])
+
+    assert manager.state["forum-1"]["seen_thread_ids"] == {"t3", "tnews"}
+    assert manager.state["forum-1"]["seen_thread_floor"] == 2
+    assert manager.get_new_threads("forum-1", [_thread("tnews"), _thread("tother")]) == [_thread("tother")]
+
+
+def test_floor_survives_wal_replay(manager, monkeypatch):
+    monkeypatch.setattr(StateManager, "MAX_SEEN_THREAD_IDS", 2)
+    manager.state_file.write_bytes(b"{}")
+    manager.load_state()
+    manager.update_forum_state("forum-1", ["t1", "t2", "t3", "t4"])
+    manager.save_state()
+    assert manager.state_file.read_bytes() == b"{}"
+
+    reloaded = StateManager(str(manager.state_file))
+    reloaded.load_state()
+
+    assert reloaded.state["forum-1"]["seen_thread_ids"] == {"t3", "t4"}
+    assert reloaded.state["forum-1"]["seen_thread_floor"] == 2
+    assert reloaded.get_new_threads("forum-1", [_thread("t1"), _thread("t5")]) == [_thread("t5")]